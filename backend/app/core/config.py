@@ -18,6 +18,30 @@ class Settings(BaseSettings):
     MAIL_SSL_TLS: bool = True
     USE_CREDENTIALS: bool = True
     BREVO_API_KEY: Optional[str] = None
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_SIZE: int = 1024
+    PASSWORD_HASH_WORKERS: int = 2
+    EMAIL_TRANSPORT: str = "brevo" # brevo, smtp, memory
+    EMAIL_OUTBOX_CONCURRENCY: int = 4
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    REMINDERS_ENABLED: bool = True
+    REMINDER_INTERVAL_MINUTES: int = 15
+    REMINDER_WINDOW_HOURS: int = 24
+    REFERENCE_CACHE_TTL_SECONDS: int = 300
+    COUNTERS_RECONCILE_MINUTES: int = 60
+    # Other workers' writes only show up once this expires, unless the
+    # change stream relay invalidates the cache (the longer TTL then applies)
+    CALENDAR_CACHE_TTL_SECONDS: int = 5
+    CALENDAR_CACHE_RELAY_TTL_SECONDS: int = 600
+    CALENDAR_CACHE_SIZE: int = 120
+    EVENTS_CHANGE_STREAM: bool = False # needs a replica set
+    THUMBNAIL_WORKERS: int = 2
+    FILE_METADATA_CACHE_SIZE: int = 2048
+    FILE_METADATA_CACHE_TTL_SECONDS: int = 60
+    UPLOAD_SHARD_MIGRATION: bool = False
+    UPLOAD_SHARD_MIGRATION_INTERVAL_SECONDS: int = 10
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_SENT_RETENTION_DAYS: int = 7
 
 
     class Config:
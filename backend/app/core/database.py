@@ -10,9 +10,13 @@ from app.models.prescription import Prescription
 from app.models.settings import VetSettings
 from app.models.file_record import FileRecord
 from app.models.service import Service
+from app.models.email_outbox import EmailOutbox
+from app.models.dashboard_counter import DashboardCounter
+from app.models.file_blob import FileBlob
 
 async def init_db():
     client = AsyncIOMotorClient(settings.MONGODB_URI)
+    # init_beanie also creates the indexes declared in each model's Settings
     await init_beanie(
         database=client[settings.DB_NAME],
         document_models=[
@@ -24,22 +28,25 @@ async def init_db():
             Prescription,
             VetSettings,
             FileRecord,
-            Service
+            Service,
+            EmailOutbox,
+            DashboardCounter,
+            FileBlob
         ]
     )
     await create_initial_user()
 
 async def create_initial_user():
-    from app.core.security import get_password_hash # Import here to avoid circular depends if any
+    from app.core.security import pwd_context, verify_password_async, get_password_hash_async # Import here to avoid circular depends if any
     
     # Ensure no whitespace issues from Env Vars
     admin_email = settings.ADMIN_EMAIL.strip()
     admin_password = settings.ADMIN_PASSWORD.strip()
     
     admin = await User.find_one(User.email == admin_email)
-    hashed = get_password_hash(admin_password)
     
     if not admin:
+        hashed = await get_password_hash_async(admin_password)
         user = User(
             name="Administrador",
             email=admin_email,
@@ -48,9 +55,13 @@ async def create_initial_user():
         )
         await user.insert()
         print(f"--- Admin user created: {admin_email} ---")
-    else:
-        # Force update password to match current environment variable
-        admin.password_hash = hashed
-        admin.email = admin_email # Ensure email matches sanitized version
+    elif (
+        pwd_context.needs_update(admin.password_hash)
+        or not await verify_password_async(admin_password, admin.password_hash)
+    ):
+        # Re-hash only when the environment password actually changed
+        admin.password_hash = await get_password_hash_async(admin_password)
         await admin.save()
         print(f"--- Admin password updated for: {admin_email} ---")
+    else:
+        print(f"--- Admin password unchanged for: {admin_email} ---")
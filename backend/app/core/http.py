@@ -0,0 +1,127 @@
+import hashlib
+import json
+import os
+import re
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import quote
+import aiofiles
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, StreamingResponse
+
+# Content addressed by the URL never changes, let browsers keep it for a year
+IMMUTABLE = "private, max-age=31536000, immutable"
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+_CHUNK_SIZE = 256 * 1024
+
+def json_etag(content: Any) -> str:
+    """
+    Strong ETag derived from the JSON representation of a payload.
+    """
+    body = json.dumps(jsonable_encoder(content), sort_keys=True, separators=(",", ":"))
+    return '"' + hashlib.sha1(body.encode()).hexdigest() + '"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak validators compare equal for GET requests
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in candidates
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    etag: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    JSON response carrying an ETag, or an empty 304 when the client already
+    has that version.
+    """
+    etag = etag or json_etag(content)
+    response_headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if headers:
+        response_headers.update(headers)
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+
+    body = json.dumps(jsonable_encoder(content), separators=(",", ":"))
+    return Response(content=body, media_type="application/json", headers=response_headers)
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    (first, last) byte of a single-range Range header. None means the whole
+    file: no header, or several ranges. Raises ValueError when unsatisfiable.
+    """
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges, the full body is a valid answer
+        return None
+    first, last = match.groups()
+    if not first:
+        # Suffix range: the last N bytes
+        if not last or int(last) == 0:
+            raise ValueError(header)
+        return max(size - int(last), 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or first > last:
+        raise ValueError(header)
+    return first, last
+
+def file_response(
+    request: Request,
+    path: str,
+    stat_result: os.stat_result,
+    etag: str,
+    media_type: str,
+    filename: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Serves an immutable file: 304 when the client has this ETag, 206 for a
+    single byte range, and otherwise a FileResponse, which the server can
+    send zero-copy (ASGI pathsend) where supported.
+    """
+    size = stat_result.st_size
+    response_headers = {"ETag": etag, "Cache-Control": IMMUTABLE, "Accept-Ranges": "bytes"}
+    if filename:
+        response_headers["Content-Disposition"] = f"attachment; filename*=utf-8''{quote(filename)}"
+    if headers:
+        response_headers.update(headers)
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=response_headers)
+
+    # A range applies only to the version named by If-Range
+    if_range = request.headers.get("if-range")
+    try:
+        byte_range = parse_range(request.headers.get("range"), size) if not if_range or if_range == etag else None
+    except ValueError:
+        return Response(status_code=416, headers={**response_headers, "Content-Range": f"bytes */{size}"})
+
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, stat_result=stat_result, headers=response_headers)
+
+    first, last = byte_range
+
+    async def body():
+        async with aiofiles.open(path, "rb") as f:
+            await f.seek(first)
+            remaining = last - first + 1
+            while remaining:
+                chunk = await f.read(min(_CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+    response_headers["Content-Range"] = f"bytes {first}-{last}/{size}"
+    response_headers["Content-Length"] = str(last - first + 1)
+    return StreamingResponse(body(), status_code=206, media_type=media_type, headers=response_headers)
@@ -0,0 +1,67 @@
+import json
+from typing import Callable
+from fastapi import HTTPException
+
+# Room for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+class UploadLimitMiddleware:
+    """
+    Rejects oversized multipart bodies before Starlette parses them.
+
+    The form parser spools every part to disk before the route runs, so a
+    check inside the handler only fires once the whole body was received.
+    Requests declaring a larger Content-Length get 413 straight away, and
+    the bytes actually received are counted so chunked or lying clients
+    are cut off as soon as they pass the limit. That happens while FastAPI
+    parses the form, which only lets an HTTPException through unchanged.
+    """
+
+    def __init__(self, app, max_size: int, max_batch_size: int):
+        self.app = app
+        self.max_size = max_size + MULTIPART_OVERHEAD
+        self.max_batch_size = max_batch_size + MULTIPART_OVERHEAD
+
+    def _limit(self, scope) -> int:
+        return self.max_batch_size if scope["path"].endswith("/files/batch") else self.max_size
+
+    async def __call__(self, scope, receive: Callable, send: Callable):
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            await self.app(scope, receive, send)
+            return
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit(scope)
+        declared = headers.get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await self._reject(send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="File too large")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+    async def _reject(self, send: Callable):
+        body = json.dumps({"detail": "File too large"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 413,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
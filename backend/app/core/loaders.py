@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+from beanie import PydanticObjectId
+from beanie.operators import In
+from app.models.patient import Patient
+from app.models.tutor import Tutor
+from app.models.file_record import FileRecord
+from app.models.settings import VetSettings
+from app.services.reference_cache import settings_cache
+
+BatchFn = Callable[[List[Hashable]], Awaitable[Dict[Hashable, Any]]]
+
+class DataLoader:
+    """
+    Coalesces every load() issued in the same event-loop tick into a single
+    batch call and memoizes the results for the lifetime of the loader.
+    """
+
+    def __init__(self, batch_fn: BatchFn, key_fn: Callable[[Any], Optional[Hashable]] = None):
+        self._batch_fn = batch_fn
+        self._key_fn = key_fn
+        self._cache: Dict[Hashable, asyncio.Future] = {}
+        self._queue: List[Tuple[Hashable, asyncio.Future]] = []
+
+    def load(self, key: Any) -> Awaitable[Any]:
+        loop = asyncio.get_running_loop()
+        if self._key_fn:
+            key = self._key_fn(key)
+
+        if key is None:
+            future = loop.create_future()
+            future.set_result(None)
+            return future
+
+        if key in self._cache:
+            return self._cache[key]
+
+        future = loop.create_future()
+        self._cache[key] = future
+        self._queue.append((key, future))
+        if len(self._queue) == 1:
+            # Wait for the current tick so sibling loads join the same batch
+            loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, keys: Iterable[Any]) -> List[Any]:
+        return list(await asyncio.gather(*[self.load(k) for k in keys]))
+
+    def prime(self, key: Any, value: Any):
+        if self._key_fn:
+            key = self._key_fn(key)
+        if key is None:
+            return
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(value)
+        self._cache[key] = future
+
+    def clear(self, key: Any = None):
+        if key is None:
+            self._cache.clear()
+            return
+        if self._key_fn:
+            key = self._key_fn(key)
+        self._cache.pop(key, None)
+
+    def _dispatch(self):
+        batch, self._queue = self._queue, []
+        asyncio.ensure_future(self._run_batch(batch))
+
+    async def _run_batch(self, batch: List[Tuple[Hashable, asyncio.Future]]):
+        try:
+            results = await self._batch_fn([key for key, _ in batch])
+        except Exception as e:
+            for key, future in batch:
+                self._cache.pop(key, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for key, future in batch:
+            if not future.done():
+                future.set_result(results.get(key))
+
+def _object_id(value: Any) -> Optional[PydanticObjectId]:
+    if value is None:
+        return None
+    try:
+        return PydanticObjectId(value)
+    except Exception:
+        return None
+
+def _documents_by_id(model) -> BatchFn:
+    async def batch(ids: List[PydanticObjectId]) -> Dict[PydanticObjectId, Any]:
+        docs = await model.find(In(model.id, ids)).to_list()
+        return {doc.id: doc for doc in docs}
+    return batch
+
+class Loaders:
+    """
+    Request-scoped loaders for the documents routes fetch by id.
+    """
+
+    def __init__(self):
+        self.patients = DataLoader(_documents_by_id(Patient), key_fn=_object_id)
+        self.tutors = DataLoader(_documents_by_id(Tutor), key_fn=_object_id)
+        self.files = DataLoader(_documents_by_id(FileRecord), key_fn=_object_id)
+        self._settings: Optional[asyncio.Future] = None
+
+    def settings(self) -> Awaitable[Optional[VetSettings]]:
+        if self._settings is None:
+            self._settings = asyncio.ensure_future(self._load_settings())
+        return self._settings
+
+    async def _load_settings(self) -> VetSettings:
+        # Shared, read-only instance from the process-wide reference cache
+        vet_settings, _ = await settings_cache.get()
+        return vet_settings
+
+def get_loaders() -> Loaders:
+    # FastAPI caches dependencies per request, so every dependant of a
+    # request shares this instance.
+    return Loaders()
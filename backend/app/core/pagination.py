@@ -0,0 +1,97 @@
+import base64
+from typing import Any, List, Optional, Tuple
+from bson import json_util
+from fastapi import HTTPException, Response
+
+ASC = 1
+DESC = -1
+
+SortKey = List[Tuple[str, int]]
+
+def encode_cursor(values: List[Any]) -> str:
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+def keyset_filter(sort: SortKey, values: List[Any]) -> dict:
+    """
+    Filter for the documents strictly after `values` in `sort` order, e.g.
+    for (date desc, _id desc): date < d OR (date == d AND _id < id).
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {"$gt" if direction == ASC else "$lt": values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+def _value(doc: Any, field: str) -> Any:
+    if isinstance(doc, dict):
+        return doc.get(field)
+    if field == "_id":
+        return doc.id
+    return getattr(doc, field)
+
+async def paginate(
+    query,
+    sort: SortKey,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    projection_model=None,
+) -> list:
+    """
+    Keyset pagination for a Beanie FindMany. The page after the last
+    returned document is advertised in the X-Next-Cursor header, so fetching
+    any page costs the same index seek. With include_total the number of
+    matching documents goes in X-Total-Count.
+    """
+    if include_total:
+        if all(not e for e in query.find_expressions):
+            # Unfiltered: the collection metadata count needs no scan
+            total = await query.document_model.get_motor_collection().estimated_document_count()
+        else:
+            total = await query.count()
+        response.headers["X-Total-Count"] = str(total)
+
+    docs, next_cursor = await fetch_page(query, sort, limit, cursor, projection_model)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return docs
+
+async def fetch_page(
+    query,
+    sort: SortKey,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    projection_model=None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetches one keyset page. Returns the documents and the cursor of the
+    next page, or None on the last page.
+    """
+    if cursor:
+        query = query.find(keyset_filter(sort, decode_cursor(cursor, len(sort))))
+
+    query = query.sort(sort)
+    if projection_model is not None:
+        query = query.project(projection_model)
+    if limit is None:
+        return await query.to_list(), None
+
+    # One extra document tells us whether there is a next page
+    docs = await query.limit(limit + 1).to_list()
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor([_value(docs[-1], f) for f, _ in sort])
@@ -0,0 +1,56 @@
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Type
+from beanie import PydanticObjectId
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+# Document fields that are never exposed through fields=
+_HIDDEN_FIELDS = {"id", "revision_id"}
+
+def parse_fields(fields: Optional[str], model, required: Iterable[str] = ()) -> Optional[FrozenSet[str]]:
+    """
+    Parses a fields= query parameter ("name,species") against a document
+    model. `required` fields (sort keys) are always added.
+    Returns None when no projection was requested.
+    """
+    if not fields:
+        return None
+
+    names = {f.strip() for f in fields.split(",") if f.strip()} - {"_id", "id"}
+    unknown = names - (set(model.model_fields) - _HIDDEN_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    names.update(f for f in required if f != "_id")
+    return frozenset(names)
+
+@lru_cache(maxsize=128)
+def projection_model(model, fields: FrozenSet[str]) -> Type[BaseModel]:
+    """
+    Read model holding only `fields` of `model`. Beanie projects the query
+    to these fields and validates just them, not the whole document.
+    """
+    definitions = {
+        name: (Optional[model.model_fields[name].annotation], None)
+        for name in sorted(fields)
+    }
+    read_model = create_model(
+        f"{model.__name__}Fields",
+        __config__=ConfigDict(populate_by_name=True),
+        id=(PydanticObjectId, Field(alias="_id")),
+        **definitions
+    )
+    projection = {"_id": 1, **{name: 1 for name in fields}}
+    read_model.Settings = type("Settings", (), {"projection": projection})
+    return read_model
+
+def projected_response(docs: List[BaseModel], response: Response) -> JSONResponse:
+    """
+    Serializes projected read models directly, bypassing the route's full
+    document response_model, and keeps headers already set on `response`.
+    """
+    content = jsonable_encoder(docs, by_alias=True)
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    return JSONResponse(content=content, headers=headers)
@@ -0,0 +1,55 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def fold(text: str) -> str:
+    """
+    Lowercases and strips accents, so "José" and "jose" compare equal.
+    """
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(fold(text))
+
+def build_search_keys(*values: Optional[str], digits: Iterable[Optional[str]] = ()) -> List[str]:
+    """
+    Distinct folded tokens of the given values. `digits` values (phones) also
+    add their digits run together, so "+56 9 9713" matches "5699713".
+    """
+    keys = []
+    for value in values:
+        keys.extend(tokenize(value))
+    for value in digits:
+        joined = "".join(c for c in (value or "") if c.isdigit())
+        if joined:
+            keys.append(joined)
+    return list(dict.fromkeys(keys))
+
+def prefix_filter(query: str, field: str = "search_keys") -> Optional[dict]:
+    """
+    Mongo filter matching documents with a key starting with every query
+    token. Anchored, case-sensitive regexes are answered from the index.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    clauses = [{field: {"$regex": "^" + re.escape(token)}} for token in tokens]
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+def rank(keys: List[str], query: str) -> float:
+    """
+    Scores a hit: exact token matches beat prefix matches, and a match on the
+    first word of the name is worth a bit more.
+    """
+    score = 0.0
+    for token in tokenize(query):
+        if token in keys:
+            score += 2
+        elif any(key.startswith(token) for key in keys):
+            score += 1
+        if keys and keys[0].startswith(token):
+            score += 0.5
+    return score
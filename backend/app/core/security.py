@@ -1,8 +1,12 @@
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import time
 from typing import Optional
 from passlib.context import CryptContext
-from jose import jwt
+from jose import jwt, JWTError
 from app.core.config import settings
+from app.core.cache import TTLCache
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -12,6 +16,20 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+# bcrypt takes ~250ms of CPU per call, so it runs on its own small pool and
+# never on the event loop. The pool size caps how many hashes run at once,
+# further calls wait in its queue.
+_hash_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+async def _run_hashing(fn, *args):
+    return await asyncio.get_running_loop().run_in_executor(_hash_executor, fn, *args)
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    return await _run_hashing(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    return await _run_hashing(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -21,3 +39,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
     return encoded_jwt
+
+# Verified token payloads, so each token's signature is checked once per process
+_token_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verifies and decodes a JWT, reusing the payload of tokens already seen.
+    Raises JWTError if the token is invalid or expired.
+    """
+    payload = _token_cache.get(token)
+    if payload is not None:
+        if payload.get("exp", 0) <= time.time():
+            _token_cache.pop(token)
+            raise JWTError("Signature has expired.")
+        return payload
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+    _token_cache.set(token, payload)
+    return payload
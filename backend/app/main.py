@@ -1,18 +1,43 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import time
 from app.core.database import init_db
 from app.core.config import settings
+from app.core.limits import UploadLimitMiddleware
+from app.services.outbox import dispatcher
+from app.services.email import close_transports
+from app.services.reminders import reminder_task
+from app.services.counters import counters_task
+from app.services.events import relay
+from app.services.shard_migrator import shard_migration_task
+from app.services.file_service import MAX_FILE_SIZE, MAX_BATCH_SIZE
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("--- STARTING DB INIT ---")
+    started = time.perf_counter()
     try:
         await init_db()
-        print("--- DB INIT SUCCESS ---")
+        print(f"--- DB INIT SUCCESS ({time.perf_counter() - started:.2f}s) ---")
+        dispatcher.start()
+        counters_task.start()
+        if settings.REMINDERS_ENABLED:
+            reminder_task.start()
+        if settings.EVENTS_CHANGE_STREAM:
+            relay.start()
+        # Opt-in, the task stops by itself once every upload is sharded
+        if settings.UPLOAD_SHARD_MIGRATION:
+            shard_migration_task.start()
     except Exception as e:
         print(f"--- DB INIT ERROR: {e} ---")
     yield
+    await reminder_task.stop()
+    await counters_task.stop()
+    await relay.stop()
+    await shard_migration_task.stop()
+    await dispatcher.stop()
+    close_transports()
 
 app = FastAPI(
     title="Paty Veterinaria API",
@@ -22,19 +47,24 @@ app = FastAPI(
     redoc_url="/api/v1/redoc",
 )
 
+# Added before CORS so the 413 still carries the CORS headers
+app.add_middleware(UploadLimitMiddleware, max_size=MAX_FILE_SIZE, max_batch_size=MAX_BATCH_SIZE)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"], # Vite default
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Total-Count"],
 )
 
 @app.get("/")
 def read_root():
     return {"message": "Paty Veterinaria API"}
 
-from app.routes import auth, tutors, patients, consultations, exams, prescriptions, files, settings
+from app.routes import auth, tutors, patients, consultations, exams, prescriptions, files
+from app.routes import settings as settings_routes
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Auth"])
 app.include_router(tutors.router, prefix="/api/v1/tutors", tags=["Tutors"])
 app.include_router(patients.router, prefix="/api/v1/patients", tags=["Patients"])
@@ -42,7 +72,7 @@ app.include_router(consultations.router, prefix="/api/v1/consultations", tags=["
 app.include_router(exams.router, prefix="/api/v1/exams", tags=["Exams"])
 app.include_router(prescriptions.router, prefix="/api/v1/prescriptions", tags=["Prescriptions"])
 app.include_router(files.router, prefix="/api/v1/files", tags=["Files"])
-app.include_router(settings.router, prefix="/api/v1/settings", tags=["Settings"])
+app.include_router(settings_routes.router, prefix="/api/v1/settings", tags=["Settings"])
 
 from app.routes import services
 app.include_router(services.router, prefix="/api/v1/services", tags=["Services"])
@@ -50,6 +80,12 @@ app.include_router(services.router, prefix="/api/v1/services", tags=["Services"]
 from app.routes import dashboard
 app.include_router(dashboard.router, prefix="/api/v1/dashboard", tags=["Dashboard"])
 
+from app.routes import search
+app.include_router(search.router, prefix="/api/v1/search", tags=["Search"])
+
+from app.routes import events
+app.include_router(events.router, prefix="/api/v1/events", tags=["Events"])
+
 from app.routes import debug
 app.include_router(debug.router, prefix="/api/v1/debug", tags=["Debug"])
 
@@ -1,9 +1,20 @@
 from beanie import Document, PydanticObjectId
 from datetime import datetime
 from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
+from app.models.file_record import FileSummary
+from pymongo import IndexModel, ASCENDING, DESCENDING
+
+class PatientSnapshot(BaseModel):
+    """
+    Copy of the patient fields the agenda shows, kept in sync by update_patient.
+    """
+    name: str
+    species: Optional[str] = None
 
 class Consultation(Document):
     patient_id: PydanticObjectId
+    patient_snapshot: Optional[PatientSnapshot] = None
     date: datetime = datetime.utcnow()
     reason: Optional[str] = None
     anamnesis: Optional[str] = None
@@ -13,9 +24,37 @@ class Consultation(Document):
     notes: Optional[str] = None
     exams_requested: Optional[str] = None
     file_ids: List[str] = []
+    files: List[FileSummary] = []
     status: str = "scheduled" # scheduled, attended, no_show
+    reminder_sent_at: Optional[datetime] = None
+    reminder_claim: Optional[str] = None
+    reminder_claimed_at: Optional[datetime] = None
     created_at: datetime = datetime.utcnow()
     updated_at: datetime = datetime.utcnow()
 
     class Settings:
         name = "consultations"
+        indexes = [
+            IndexModel([("patient_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]),
+            # Covers the agenda and calendar reads, no document fetch needed
+            IndexModel([
+                ("date", ASCENDING), ("_id", ASCENDING), ("patient_id", ASCENDING),
+                ("patient_snapshot.name", ASCENDING), ("patient_snapshot.species", ASCENDING),
+                ("reason", ASCENDING)
+            ], name="agenda_covering"),
+        ]
+
+class ConsultationSummary(BaseModel):
+    """
+    Lightweight read model for consultation lists: no clinical free text.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: PydanticObjectId = Field(alias="_id")
+    patient_id: PydanticObjectId
+    date: datetime
+    reason: Optional[str] = None
+    status: str = "scheduled"
+
+    class Settings:
+        projection = {"_id": 1, "patient_id": 1, "date": 1, "reason": 1, "status": 1}
@@ -0,0 +1,12 @@
+from beanie import Document
+
+class DashboardCounter(Document):
+    """
+    One counter of the dashboard, e.g. "patients" or "consultations:2024-05-01".
+    Updated with $inc by the routes, reconciled periodically.
+    """
+    id: str
+    value: int = 0
+
+    class Settings:
+        name = "dashboard_counters"
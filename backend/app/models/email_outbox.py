@@ -0,0 +1,38 @@
+from beanie import Document
+from datetime import datetime
+from typing import Optional
+from pydantic import Field
+from pymongo import IndexModel, ASCENDING
+from app.core.config import settings
+
+class EmailOutbox(Document):
+    to_email: str
+    subject: str
+    body: str
+    html_body: Optional[str] = None
+    status: str = "pending" # pending, sending, sent, failed
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    locked_until: Optional[datetime] = None
+    claim_token: Optional[str] = None
+    dedupe_key: Optional[str] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    sent_at: Optional[datetime] = None
+
+    class Settings:
+        name = "email_outbox"
+        indexes = [
+            IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+            IndexModel(
+                [("dedupe_key", ASCENDING)],
+                unique=True,
+                partialFilterExpression={"dedupe_key": {"$type": "string"}}
+            ),
+            # Delivered mail is purged, bodies include password reset codes.
+            # Only rows with a sent_at expire, pending and failed ones stay
+            IndexModel(
+                [("sent_at", ASCENDING)],
+                expireAfterSeconds=settings.EMAIL_OUTBOX_SENT_RETENTION_DAYS * 24 * 3600
+            ),
+        ]
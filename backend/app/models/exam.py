@@ -1,6 +1,8 @@
 from beanie import Document, PydanticObjectId
 from datetime import datetime
 from typing import Optional, List
+from app.models.file_record import FileSummary
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
 class Exam(Document):
     patient_id: PydanticObjectId
@@ -9,7 +11,11 @@ class Exam(Document):
     date: datetime = datetime.utcnow()
     result_text: Optional[str] = None
     file_ids: List[str] = []
+    files: List[FileSummary] = []
     created_at: datetime = datetime.utcnow()
 
     class Settings:
         name = "exams"
+        indexes = [
+            IndexModel([("patient_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]),
+        ]
@@ -0,0 +1,21 @@
+from beanie import Document
+from datetime import datetime
+from typing import Optional
+from pydantic import Field
+
+class FileBlob(Document):
+    """
+    Stored file content, keyed by its SHA-256. Every FileRecord pointing to
+    it holds one reference; the file is unlinked with the last one.
+    `claimed_at` is set while the file is being deleted or moved, and no
+    upload takes a reference on the blob meanwhile.
+    """
+    id: str # sha256 hex digest
+    path: str
+    size: int
+    ref_count: int = 0
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    claimed_at: Optional[datetime] = None
+
+    class Settings:
+        name = "file_blobs"
@@ -1,6 +1,8 @@
 from beanie import Document
 from datetime import datetime
 from typing import Optional
+from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING
 
 class FileRecord(Document):
     owner_type: str # 'exam', 'consultation', 'prescription', 'user'
@@ -8,10 +10,38 @@ class FileRecord(Document):
     path: str
     original_name: str
     mime_type: str
-    mime_type: str
     size: int
+    sha256: Optional[str] = None
     comment: Optional[str] = None
     created_at: datetime = datetime.utcnow()
+    shard_claim: Optional[str] = None
+    shard_claimed_at: Optional[datetime] = None
 
     class Settings:
         name = "files"
+        indexes = [
+            IndexModel([("owner_type", ASCENDING), ("owner_id", ASCENDING)]),
+        ]
+
+class FileSummary(BaseModel):
+    """
+    Copy of a file's display metadata embedded in the owning exam or
+    consultation, so record lists don't have to read the files collection.
+    """
+    id: str
+    original_name: str
+    mime_type: str
+    size: int
+    comment: Optional[str] = None
+    created_at: datetime
+
+    @classmethod
+    def from_record(cls, record: FileRecord) -> "FileSummary":
+        return cls(
+            id=str(record.id),
+            original_name=record.original_name,
+            mime_type=record.mime_type,
+            size=record.size,
+            comment=record.comment,
+            created_at=record.created_at
+        )
@@ -1,7 +1,10 @@
-from beanie import Document, PydanticObjectId
+from beanie import Document, PydanticObjectId, before_event, Insert, Replace, Save
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field
 from enum import Enum
+from pymongo import IndexModel, ASCENDING
+from app.core.search import build_search_keys
 
 class Species(str, Enum):
     DOG = "Perro"
@@ -20,7 +23,35 @@ class Patient(Document):
     notes: Optional[str] = None
     tutor_id: PydanticObjectId
     tutor2_id: Optional[PydanticObjectId] = None
+    search_keys: List[str] = []
     created_at: datetime = datetime.utcnow()
 
+    @before_event(Insert, Replace, Save)
+    def update_search_keys(self):
+        self.search_keys = build_search_keys(self.name)
+
     class Settings:
         name = "patients"
+        indexes = [
+            IndexModel([("tutor_id", ASCENDING)]),
+            IndexModel([("tutor2_id", ASCENDING)]),
+            IndexModel([("search_keys", ASCENDING)]),
+            IndexModel([("name", ASCENDING), ("_id", ASCENDING)]),
+        ]
+
+class PatientSummary(BaseModel):
+    """
+    Lightweight read model for patient lists.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    id: PydanticObjectId = Field(alias="_id")
+    name: str
+    species: str
+    breed: str
+    sex: str
+    tutor_id: PydanticObjectId
+    tutor2_id: Optional[PydanticObjectId] = None
+
+    class Settings:
+        projection = {"_id": 1, "name": 1, "species": 1, "breed": 1, "sex": 1, "tutor_id": 1, "tutor2_id": 1}
@@ -2,6 +2,7 @@ from beanie import Document, PydanticObjectId
 from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
 class PrescriptionItem(BaseModel):
     medication: str
@@ -21,3 +22,6 @@ class Prescription(Document):
 
     class Settings:
         name = "prescriptions"
+        indexes = [
+            IndexModel([("patient_id", ASCENDING), ("date", DESCENDING), ("_id", DESCENDING)]),
+        ]
@@ -2,6 +2,8 @@ from beanie import Document
 from typing import Dict, Optional
 from datetime import datetime
 
+DEFAULT_REMINDER_TEMPLATE = "Hola {tutor_name},\n\nLe recordamos que {patient_name} tiene hora agendada para mañana.\nFecha: {date}\nMotivo: {reason}\n{notes}\n\nGracias por confiar en PattyVet."
+
 class VetSettings(Document):
     clinic_name: str = "Paty Veterinaria"
     address: str = "Dirección"
@@ -10,7 +12,8 @@ class VetSettings(Document):
     city: str = "Ciudad"
     
     email_templates: Dict[str, str] = {
-        "appointment_confirmation": "Hola {tutor_name},\n\nSu hora para {patient_name} ha sido reservada con éxito.\nFecha: {date}\nMotivo: {reason}\n{notes}\n\nGracias por confiar en PattyVet."
+        "appointment_confirmation": "Hola {tutor_name},\n\nSu hora para {patient_name} ha sido reservada con éxito.\nFecha: {date}\nMotivo: {reason}\n{notes}\n\nGracias por confiar en PattyVet.",
+        "appointment_reminder": DEFAULT_REMINDER_TEMPLATE
     }
     
     schedule: Dict[str, str] = {
@@ -1,6 +1,11 @@
-from beanie import Document
+from beanie import Document, before_event, Insert, Replace, Save
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+from pymongo import IndexModel, ASCENDING
+from app.core.search import build_search_keys
+
+def tutor_search_keys(full_name: str, phone: str) -> List[str]:
+    return build_search_keys(full_name, phone, digits=[phone])
 
 class Tutor(Document):
     full_name: str
@@ -8,7 +13,16 @@ class Tutor(Document):
     email: Optional[str] = None
     address: Optional[str] = None
     notes: Optional[str] = None
+    search_keys: List[str] = []
     created_at: datetime = datetime.utcnow()
 
+    @before_event(Insert, Replace, Save)
+    def update_search_keys(self):
+        self.search_keys = tutor_search_keys(self.full_name, self.phone)
+
     class Settings:
         name = "tutors"
+        indexes = [
+            IndexModel([("search_keys", ASCENDING)]),
+            IndexModel([("full_name", ASCENDING), ("_id", ASCENDING)]),
+        ]
@@ -1,6 +1,7 @@
 from beanie import Document
 from datetime import datetime
 from typing import Optional
+from pymongo import IndexModel, ASCENDING
 
 class User(Document):
     name: str = "Admin"
@@ -14,3 +15,6 @@ class User(Document):
 
     class Settings:
         name = "users"
+        indexes = [
+            IndexModel([("email", ASCENDING)], unique=True),
+        ]
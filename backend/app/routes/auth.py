@@ -1,14 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from app.models.user import User
-from app.core.security import verify_password, create_access_token
+from app.core.security import verify_password_async, get_password_hash_async, create_access_token, decode_access_token
+from app.core.cache import TTLCache
+from app.core.config import settings
 from typing import Annotated
 from pydantic import BaseModel
-from passlib.context import CryptContext
 
 router = APIRouter()
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 class UserRegister(BaseModel):
     name: str
@@ -16,9 +16,27 @@ class UserRegister(BaseModel):
     password: str
     role: str = "assistant"
 
+# Resolved users keyed by token subject (email)
+_user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+def invalidate_user(email: str = None):
+    """
+    Drops a cached user after it changes. Without an email, clears the cache.
+    """
+    if email is None:
+        _user_cache.clear()
+    else:
+        _user_cache.pop(email)
+
 async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
-    from jose import JWTError, jwt
-    from app.core.config import settings
+    return await resolve_user(token)
+
+async def resolve_user(token: str) -> User:
+    """
+    User of an access token, for callers that can't send the Authorization
+    header (EventSource). Raises 401 when the token is invalid.
+    """
+    from jose import JWTError
     
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -26,16 +44,19 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]):
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+        payload = decode_access_token(token)
         email: str = payload.get("sub")
         if email is None:
             raise credentials_exception
     except JWTError:
         raise credentials_exception
         
-    user = await User.find_one(User.email == email)
+    user = _user_cache.get(email)
     if user is None:
-        raise credentials_exception
+        user = await User.find_one(User.email == email)
+        if user is None:
+            raise credentials_exception
+        _user_cache.set(email, user)
     return user
 
 @router.post("/register")
@@ -44,7 +65,7 @@ async def register_user(data: UserRegister, current_user: Annotated[User, Depend
     if existing:
         raise HTTPException(status_code=400, detail="Email already exists")
     
-    hashed = pwd_context.hash(data.password)
+    hashed = await get_password_hash_async(data.password)
     user = User(
         name=data.name,
         email=data.email,
@@ -52,12 +73,13 @@ async def register_user(data: UserRegister, current_user: Annotated[User, Depend
         role=data.role
     )
     await user.insert()
+    invalidate_user(user.email)
     return {"message": "User created", "id": str(user.id)}
 
 @router.post("/login")
 async def login(form_data: Annotated[OAuth2PasswordRequestForm, Depends()]):
     user = await User.find_one(User.email == form_data.username)
-    if not user or not verify_password(form_data.password, user.password_hash):
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos",
@@ -96,6 +118,7 @@ async def delete_user(id: str, current_user: Annotated[User, Depends(get_current
         raise HTTPException(status_code=400, detail="Cannot delete your own account")
     
     await user.delete()
+    invalidate_user(user.email)
     return {"message": "User deleted"}
 
 # Password Reset Flow
@@ -128,17 +151,16 @@ async def forgot_password(data: ForgotPasswordRequest):
     # Generate 6-digit code
     code = secrets.token_hex(3).upper() # 6 chars
     
-    user.reset_token = code
-    user.reset_token_expiry = datetime.utcnow() + timedelta(minutes=15)
-    await user.save()
+    await user.set({
+        "reset_token": code,
+        "reset_token_expiry": datetime.utcnow() + timedelta(minutes=15)
+    })
+    invalidate_user(user.email)
     
-    # Send Email
+    # Queue the email, the outbox dispatcher delivers it in the background
     try:
-        from app.services.email import send_email_sync
-        # Running sync function in async context properly? 
-        # Ideally should use run_in_executor but for low traffic it's ok-ish or just call it.
-        # It's blocking but simple.
-        send_email_sync(
+        from app.services.outbox import enqueue_email
+        await enqueue_email(
             to_email=user.email,
             subject="Restablecimiento de Contraseña - PattyVet",
             body=f"Hola {user.name},\n\nTu código de verificación para restablecer tu contraseña es: {code}\n\nEste código expira en 15 minutos.\n\nSi no solicitaste esto, ignora este correo.",
@@ -175,7 +197,7 @@ async def forgot_password(data: ForgotPasswordRequest):
             """
         )
     except Exception as e:
-        print(f"Error sending email: {e}")
+        print(f"Error queueing email: {e}")
         raise HTTPException(status_code=500, detail="Error al enviar el correo")
         
     return {"message": "Código de verificación enviado"}
@@ -209,9 +231,11 @@ async def reset_password(data: ResetPasswordRequest):
         raise HTTPException(status_code=400, detail="El código ha expirado")
     
     # Reset Password
-    user.password_hash = pwd_context.hash(data.new_password)
-    user.reset_token = None
-    user.reset_token_expiry = None
-    await user.save()
+    await user.set({
+        "password_hash": await get_password_hash_async(data.new_password),
+        "reset_token": None,
+        "reset_token_expiry": None
+    })
+    invalidate_user(user.email)
     
     return {"message": "Contraseña actualizada exitosamente"}
@@ -1,14 +1,19 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, BackgroundTasks, Response
 from typing import List, Optional
 from datetime import datetime
-from app.models.consultation import Consultation
-from app.models.patient import Patient
-from app.models.tutor import Tutor
+from app.models.consultation import Consultation, PatientSnapshot
 from app.routes.auth import get_current_user
-from app.services.file_service import save_upload_file
-from app.services.email import send_email_sync
+from app.services import counters
+from app.services.calendar_cache import calendar_cache
+from app.services.events import publish_consultation
+from app.core.loaders import Loaders, get_loaders
+from app.core.pagination import paginate, DESC
+from app.core.projection import parse_fields, projection_model, projected_response
+from app.services.file_service import save_upload_file, save_upload_files, attach_files, detach_file, delete_stored_file, delete_owner_files
+from app.services.outbox import enqueue_email
 from pydantic import BaseModel
 from beanie import PydanticObjectId
+import asyncio
 
 router = APIRouter()
 
@@ -35,17 +40,18 @@ class ConsultationUpdate(BaseModel):
     exams_requested: Optional[str] = None
     status: Optional[str] = None
 
-from app.services.templates import get_email_template
+from app.services.templates import get_email_template, render_custom_email, notes_block
 
 @router.post("/", response_model=Consultation)
 async def create_consultation(
     data: ConsultationCreate, 
     background_tasks: BackgroundTasks,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     try:
         pid = PydanticObjectId(data.patient_id)
-        patient = await Patient.get(pid)
+        patient = await loaders.patients.load(pid)
         if not patient:
             raise HTTPException(status_code=404, detail="Patient not found")
     except:
@@ -53,38 +59,42 @@ async def create_consultation(
     
     con_data = data.model_dump()
     con_data['patient_id'] = pid
+    con_data['patient_snapshot'] = PatientSnapshot(name=patient.name, species=patient.species)
     if not con_data['date']:
         con_data['date'] = datetime.utcnow()
         
     new_con = Consultation(**con_data)
     await new_con.insert()
+    await counters.increment({counters.consultations_key(new_con.date): 1})
+    calendar_cache.invalidate(new_con.date)
+    publish_consultation("created", new_con)
 
     # Send confirmation email
     try:
-        tutor = await Tutor.get(patient.tutor_id)
+        # Tutor and settings for the template are fetched concurrently
+        tutor, settings = await asyncio.gather(
+            loaders.tutors.load(patient.tutor_id),
+            loaders.settings()
+        )
         if tutor and tutor.email:
             print(f"DEBUG: Attempting to send email to {tutor.email}")
             subject = "Confirmación de Reserva - PattyVet"
             date_str = new_con.date.strftime('%d/%m/%Y %H:%M')
             
-            # Fetch settings for template
-            from app.models.settings import VetSettings
-            settings = await VetSettings.find_one()
             template = settings.email_templates.get("appointment_confirmation") if settings else None
 
             if template:
                 print("DEBUG: Using custom template")
                 # Use dynamic template
-                formatted_content = template.format(
+                body, html_body = render_custom_email(
+                    template,
+                    "Reserva Confirmada",
                     tutor_name=tutor.full_name,
                     patient_name=patient.name,
                     date=date_str,
                     reason=new_con.reason,
-                    notes=f"""<br><br><div style="background-color: #f0fdf4; border: 1px solid #bbf7d0; border-radius: 6px; padding: 12px;"><strong>Indicaciones:</strong><br>{new_con.notes}</div>""" if new_con.notes else ""
-                ).replace('\n', '<br>') # Simple newline to nice HTML conversion
-                
-                html_content = formatted_content
-                body = formatted_content.replace('<br>', '\n') # specific naive strip for plain text
+                    notes=notes_block(new_con.notes)
+                )
             else:
                 print("DEBUG: Using default template")
                 # Default Hardcoded
@@ -103,11 +113,10 @@ Motivo: {new_con.reason}
                 </ul>
                 <p>Gracias por confiar en nosotros.</p>
                 """
+                html_body = get_email_template("Reserva Confirmada", html_content)
             
-            html_body = get_email_template("Reserva Confirmada", html_content)
-            
-            print(f"DEBUG: Sending email synchronously to {tutor.email}")
-            send_email_sync(tutor.email, subject, body, html_body)
+            print(f"DEBUG: Queueing email to {tutor.email}")
+            await enqueue_email(tutor.email, subject, body, html_body)
         else:
             print(f"DEBUG: Tutor not found or no email. Tutor: {tutor}, Email: {tutor.email if tutor else 'None'}")
     except Exception as e:
@@ -126,7 +135,8 @@ async def update_consultation(
     data: ConsultationUpdate, 
     background_tasks: BackgroundTasks,
     notify_tutor: bool = False,
-    user = Depends(get_current_user)
+    user = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
 ):
     con = await Consultation.get(id)
     if not con:
@@ -134,14 +144,24 @@ async def update_consultation(
 
     old_date = con.date
     update_data = data.model_dump(exclude_unset=True)
+    if data.date and data.date != old_date:
+        # A rescheduled appointment needs a new reminder
+        update_data['reminder_sent_at'] = None
     await con.set(update_data)
+    calendar_cache.invalidate(old_date, con.date)
+    publish_consultation("updated", con)
+    if data.date and counters.consultations_key(data.date) != counters.consultations_key(old_date):
+        await counters.increment({
+            counters.consultations_key(old_date): -1,
+            counters.consultations_key(data.date): 1
+        })
     
     # Check if date was updated and is different AND notification is requested
     if notify_tutor and data.date and data.date != old_date:
         try:
-            patient = await Patient.get(con.patient_id)
+            patient = await loaders.patients.load(con.patient_id)
             if patient:
-                tutor = await Tutor.get(patient.tutor_id)
+                tutor = await loaders.tutors.load(patient.tutor_id)
                 if tutor and tutor.email:
                     print(f"DEBUG: Reschedule - Sending email to {tutor.email}")
                     subject = "Tu cita ha sido reagendada - PattyVet"
@@ -163,8 +183,8 @@ async def update_consultation(
 # In update_consultation:
                     html_body = get_email_template("Cita Reagendada", html_content)
                     
-                    print(f"DEBUG: Sending reschedule email synchronously to {tutor.email}")
-                    send_email_sync(tutor.email, subject, body, html_body)
+                    print(f"DEBUG: Queueing reschedule email to {tutor.email}")
+                    await enqueue_email(tutor.email, subject, body, html_body)
                 else:
                     print("DEBUG: Reschedule - Tutor/Email missing")
         except Exception as e:
@@ -179,45 +199,43 @@ async def delete_consultation(id: str, user = Depends(get_current_user)):
     if not con:
         raise HTTPException(status_code=404, detail="Consultation not found")
     await con.delete()
-    return {"message": "Deleted"}
-
-    await con.delete()
+    await delete_owner_files("consultation", str(con.id))
+    await counters.increment({counters.consultations_key(con.date): -1})
+    calendar_cache.invalidate(con.date)
+    publish_consultation("deleted", con)
     return {"message": "Deleted"}
 
 @router.get("/patient/{patient_id}")
-async def get_patient_consultations(patient_id: str, user = Depends(get_current_user)):
+async def get_patient_consultations(
+    patient_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    user = Depends(get_current_user)
+):
     try:
         pid = PydanticObjectId(patient_id)
     except:
         raise HTTPException(status_code=400, detail="Invalid Patient ID")
         
-    consultations = await Consultation.find(Consultation.patient_id == pid).sort("-date").to_list()
+    sort = [("date", DESC), ("_id", DESC)]
+    selected = parse_fields(fields, Consultation, required=[f for f, _ in sort])
+    if selected is not None:
+        # Sparse fieldset: skips the clinical free text
+        docs = await paginate(
+            Consultation.find(Consultation.patient_id == pid), sort,
+            response, limit, cursor, include_total,
+            projection_model(Consultation, selected)
+        )
+        return projected_response(docs, response)
     
-    # Enrich with full file records
-    from app.models.file_record import FileRecord
-    from beanie.operators import In
-
-    all_file_ids = []
-    for c in consultations:
-        all_file_ids.extend(c.file_ids)
-        
-    if all_file_ids:
-        files = await FileRecord.find(In(FileRecord.id, [PydanticObjectId(fid) for fid in all_file_ids])).to_list()
-        files_map = {str(f.id): f for f in files}
-        
-        result = []
-        for c in consultations:
-            c_dict = c.model_dump()
-            c_dict['_id'] = str(c.id) # Ensure _id is present for frontend compatibility
-            c_dict['id'] = str(c.id)
-            c_dict['files'] = []
-            for fid in c.file_ids:
-                if fid in files_map:
-                    c_dict['files'].append(files_map[fid])
-            result.append(c_dict)
-        return result
-
-    return consultations
+    # File summaries are embedded, the consultations are all we need to read
+    return await paginate(
+        Consultation.find(Consultation.patient_id == pid), sort,
+        response, limit, cursor, include_total
+    )
 
 @router.post("/{id}/files")
 async def upload_consultation_file(id: str, file: UploadFile = File(...), user = Depends(get_current_user)):
@@ -226,34 +244,31 @@ async def upload_consultation_file(id: str, file: UploadFile = File(...), user =
         raise HTTPException(status_code=404, detail="Consultation not found")
     
     record = await save_upload_file(file, "consultation", str(con.id))
-    con.file_ids.append(str(record.id))
-    await con.save()
+    await attach_files(con, [record])
     return record
 
+@router.post("/{id}/files/batch")
+async def upload_consultation_files(id: str, files: List[UploadFile] = File(...), user = Depends(get_current_user)):
+    con = await Consultation.get(id)
+    if not con:
+        raise HTTPException(status_code=404, detail="Consultation not found")
+    
+    records = await save_upload_files(files, "consultation", str(con.id))
+    await attach_files(con, records)
+    return records
+
 @router.delete("/{id}/files/{file_id}")
-async def delete_consultation_file(id: str, file_id: str, user = Depends(get_current_user)):
+async def delete_consultation_file(id: str, file_id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
     con = await Consultation.get(id)
     if not con:
         raise HTTPException(status_code=404, detail="Consultation not found")
     
     if file_id in con.file_ids:
-        con.file_ids.remove(file_id)
-        await con.save()
-        
-        # Determine if we should delete the actual file record and file from disk
-        # Ideally, yes.
-        from app.models.file_record import FileRecord
-        import os
-        from app.core.config import settings
+        await detach_file(con, file_id)
         
-        file_record = await FileRecord.get(file_id)
+        # The record and the file on disk go too
+        file_record = await loaders.files.load(file_id)
         if file_record:
-            file_path = os.path.join(settings.UPLOAD_DIR, file_record.path)
-            if os.path.exists(file_path):
-                try:
-                    os.remove(file_path)
-                except Exception as e:
-                    print(f"Error deleting file from disk: {e}")
-            await file_record.delete()
+            await delete_stored_file(file_record)
 
     return {"message": "File deleted"}
@@ -1,31 +1,74 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from datetime import datetime, timedelta
 from app.models.patient import Patient
-from app.models.tutor import Tutor
 from app.models.consultation import Consultation
 from app.routes.auth import get_current_user
-from beanie.operators import GTE
+from app.services import counters
+from app.services.calendar_cache import calendar_cache
+from app.core.http import conditional_json_response
 
 router = APIRouter()
 
 @router.get("/stats")
 async def get_dashboard_stats(user = Depends(get_current_user)):
-    total_patients = await Patient.count()
-    total_tutors = await Tutor.count()
-    
-    # Consultations today
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_end = today_start + timedelta(days=1)
-    
-    consultations_today = await Consultation.find(
-        Consultation.date >= today_start,
-        Consultation.date < today_end
-    ).count()
+    # Maintained by the create/delete routes, a single indexed read
+    today = counters.consultations_key(datetime.utcnow())
+    values = await counters.read_counters([counters.PATIENTS, counters.TUTORS, today])
     
     return {
-        "total_patients": total_patients,
-        "total_tutors": total_tutors,
-        "consultations_today": consultations_today
+        "total_patients": values[counters.PATIENTS],
+        "total_tutors": values[counters.TUTORS],
+        "consultations_today": values[today]
+    }
+
+def _to_iso(d: datetime) -> str:
+    # Ensure UTC timezone is indicated
+    return d.isoformat() + 'Z' if d.tzinfo is None else d.isoformat()
+
+# Only fields of the agenda_covering index, so Mongo answers from the index
+AGENDA_PROJECTION = {
+    "_id": 1, "date": 1, "reason": 1, "patient_id": 1,
+    "patient_snapshot.name": 1, "patient_snapshot.species": 1
+}
+
+async def _agenda(match: dict, sort: bool = True, limit: int = None) -> list:
+    """
+    Consultations of the agenda with the patient name and species taken from
+    their embedded snapshot. Consultations written before the snapshot
+    existed are resolved with one extra patients query.
+    """
+    cursor = Consultation.get_motor_collection().find(match, AGENDA_PROJECTION)
+    if sort:
+        cursor = cursor.sort("date", 1)
+    if limit:
+        cursor = cursor.limit(limit)
+    rows = await cursor.to_list(None)
+
+    # A covered read rebuilds a missing snapshot from null index keys as
+    # {"name": None, ...}, so the name is what tells it apart
+    missing = list({c["patient_id"] for c in rows if not (c.get("patient_snapshot") or {}).get("name")})
+    if missing:
+        patients = await Patient.get_motor_collection().find(
+            {"_id": {"$in": missing}}, {"name": 1, "species": 1}
+        ).to_list(None)
+        snapshots = {p["_id"]: p for p in patients}
+        for c in rows:
+            if not (c.get("patient_snapshot") or {}).get("name"):
+                c["patient_snapshot"] = snapshots.get(c["patient_id"], {})
+
+    for c in rows:
+        snapshot = c.pop("patient_snapshot")
+        c["patient_name"] = snapshot.get("name")
+        c["patient_species"] = snapshot.get("species")
+    return rows
+
+def _consultation_row(c: dict) -> dict:
+    return {
+        "id": str(c["_id"]),
+        "date": _to_iso(c["date"]),
+        "reason": c.get("reason"),
+        "patient_name": c.get("patient_name") or "Desconocido",
+        "patient_species": c.get("patient_species") or ""
     }
 
 @router.get("/today")
@@ -34,87 +77,45 @@ async def get_today_consultations(user = Depends(get_current_user)):
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
     today_end = today_start + timedelta(days=1)
     
-    consultations = await Consultation.find(
-        Consultation.date >= today_start,
-        Consultation.date < today_end
-    ).sort("date").to_list()
+    consultations = await _agenda({"date": {"$gte": today_start, "$lt": today_end}})
     
-    result = []
-    result = []
-    for c in consultations:
-        patient = await Patient.get(c.patient_id)
-        
-        # Ensure UTC timezone is indicated
-        date_str = c.date.isoformat() + 'Z' if c.date.tzinfo is None else c.date.isoformat()
-
-        result.append({
-            "id": str(c.id),
-            "date": date_str,
-            "reason": c.reason,
-            "patient_name": patient.name if patient else "Desconocido",
-            "patient_species": patient.species if patient else ""
-        })
-        
-    return result
+    return [_consultation_row(c) for c in consultations]
 
 @router.get("/upcoming")
 async def get_upcoming_consultations(limit: int = 5, user = Depends(get_current_user)):
     now = datetime.utcnow()
-    # Fetch upcoming consultations
-    consultations = await Consultation.find(
-        Consultation.date >= now
-    ).sort("date").limit(limit).to_list()
+    consultations = await _agenda({"date": {"$gte": now}}, limit=limit)
     
-    # Enrich with patient data
-    result = []
+    return [_consultation_row(c) for c in consultations]
+
+async def _calendar_month(start: datetime, end: datetime) -> list:
+    consultations = await _agenda({"date": {"$gte": start, "$lt": end}})
+    
+    rows = []
     for c in consultations:
-        patient = await Patient.get(c.patient_id)
-        
-        # Ensure UTC timezone is indicated
-        date_str = c.date.isoformat() + 'Z' if c.date.tzinfo is None else c.date.isoformat()
+        # Naive datetimes represent UTC (we use datetime.utcnow()), so append Z
+        start_date = c["date"]
+        end_date = start_date + timedelta(minutes=30)
         
-        result.append({
-            "id": str(c.id),
-            "date": date_str,
-            "reason": c.reason,
-            "patient_name": patient.name if patient else "Desconocido",
-            "patient_species": patient.species if patient else ""
-        })
+        name = c.get("patient_name")
+        rows.append((start_date, {
+            "id": str(c["_id"]),
+            "title": f"{name} ({c.get('patient_species')})" if name else "Desconocido",
+            "start": _to_iso(start_date),
+            "end": _to_iso(end_date), 
+            "reason": c.get("reason"),
+            "patient_id": str(c["patient_id"])
+        }))
         
-    return result
+    return rows
 
 @router.get("/calendar")
 async def get_calendar_events(
+    request: Request,
     start: datetime,
     end: datetime,
     user = Depends(get_current_user)
 ):
-    consultations = await Consultation.find(
-        Consultation.date >= start,
-        Consultation.date <= end
-    ).to_list()
-    
-    events = []
-    for c in consultations:
-        patient = await Patient.get(c.patient_id)
-        
-        # Ensure UTC timezone is indicated if naive
-        start_date = c.date
-        end_date = c.date + timedelta(minutes=30)
-        
-        # If naive, assume UTC and append Z. If aware, isoformat will include offset.
-        # But safest for standard JS consumption is forcing ISO with Z if it's really UTC.
-        # Since we use datetime.utcnow(), it is naive but represents UTC.
-        start_str = start_date.isoformat() + 'Z' if start_date.tzinfo is None else start_date.isoformat()
-        end_str = end_date.isoformat() + 'Z' if end_date.tzinfo is None else end_date.isoformat()
-
-        events.append({
-            "id": str(c.id),
-            "title": f"{patient.name} ({patient.species.value if hasattr(patient.species, 'value') else patient.species})" if patient else "Desconocido",
-            "start": start_str,
-            "end": end_str, 
-            "reason": c.reason,
-            "patient_id": str(c.patient_id)
-        })
-        
-    return events
+    # Assembled from cached month buckets, unchanged ranges answer 304
+    events, etag = await calendar_cache.events(start, end, _calendar_month)
+    return conditional_json_response(request, events, etag)
@@ -1,9 +1,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import asyncio
 from app.core.config import settings
+from app.services.email import EmailMessage, get_smtp_transport
 
 router = APIRouter()
 
@@ -21,28 +20,14 @@ async def test_email(data: EmailTest):
         if not user or not password:
             return {"status": "error", "message": "Faltan credenciales MAIL_USERNAME o MAIL_PASSWORD"}
 
-        msg = MIMEMultipart('alternative')
-        msg['From'] = settings.MAIL_FROM or user
-        msg['To'] = data.to_email
-        msg['Subject'] = "Prueba de Correo - PattyVet Debug"
-        
-        body = f"Prueba desde {server_host}:{port} (SSL={settings.MAIL_SSL_TLS})."
-        part1 = MIMEText(body, 'plain')
-        msg.attach(part1)
-
-        # SMTP Connection Logic
-        if settings.MAIL_SSL_TLS:
-            server = smtplib.SMTP_SSL(server_host, port)
-        else:
-            server = smtplib.SMTP(server_host, port)
-            if settings.MAIL_STARTTLS:
-                server.starttls()
+        message = EmailMessage(
+            to_email=data.to_email,
+            subject="Prueba de Correo - PattyVet Debug",
+            body=f"Prueba desde {server_host}:{port} (SSL={settings.MAIL_SSL_TLS})."
+        )
 
-        server.set_debuglevel(1)
-        server.login(user, password)
-        text = msg.as_string()
-        server.sendmail(user, data.to_email, text)
-        server.quit()
+        # Reuses a pooled SMTP connection instead of a new handshake per send
+        await asyncio.to_thread(get_smtp_transport().send, message)
         
         return {"status": "success", "message": f"Correo enviado a {data.to_email}"}
     except Exception as e:
@@ -0,0 +1,39 @@
+import asyncio
+import json
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from app.routes.auth import resolve_user
+from app.services.events import broker
+
+router = APIRouter()
+
+# Comment line sent when idle, keeps proxies from closing the stream
+HEARTBEAT_SECONDS = 15
+
+@router.get("/stream")
+async def stream_events(request: Request, token: str):
+    # EventSource can't send headers, the token comes in the query string
+    await resolve_user(token)
+
+    queue = broker.subscribe()
+
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": ping\n\n"
+                    continue
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Response
 from typing import List, Optional
 from datetime import datetime
 from app.models.exam import Exam
-from app.models.patient import Patient
 from app.routes.auth import get_current_user
-from app.services.file_service import save_upload_file
+from app.core.loaders import Loaders, get_loaders
+from app.core.pagination import paginate, DESC
+from app.core.projection import parse_fields, projection_model, projected_response
+from app.services.file_service import save_upload_file, save_upload_files, attach_files, delete_owner_files
 from pydantic import BaseModel
 from beanie import PydanticObjectId
 
@@ -23,22 +25,12 @@ class ExamUpdate(BaseModel):
     result_text: Optional[str] = None
 
 from fastapi import Form
-from app.models.file_record import FileRecord
-
-class FileDTO(BaseModel):
-    id: str
-    original_name: str
-    comment: Optional[str] = None
-    created_at: datetime
-
-class ExamWithFiles(Exam):
-    files: List[FileDTO] = []
 
 @router.post("/", response_model=Exam)
-async def create_exam(data: ExamCreate, user = Depends(get_current_user)):
+async def create_exam(data: ExamCreate, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
     try:
         pid = PydanticObjectId(data.patient_id)
-        if not await Patient.get(pid):
+        if not await loaders.patients.load(pid):
              raise HTTPException(status_code=404, detail="Patient not found")
     except:
         raise HTTPException(status_code=400, detail="Invalid Patient ID")
@@ -60,38 +52,30 @@ async def create_exam(data: ExamCreate, user = Depends(get_current_user)):
     await new_exam.insert()
     return new_exam
 
-@router.get("/patient/{patient_id}", response_model=List[ExamWithFiles])
-async def get_patient_exams(patient_id: str, user = Depends(get_current_user)):
+@router.get("/patient/{patient_id}", response_model=List[Exam])
+async def get_patient_exams(
+    patient_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    user = Depends(get_current_user)
+):
     try:
          pid = PydanticObjectId(patient_id)
     except:
         return []
         
-    exams = await Exam.find(Exam.patient_id == pid).sort("-date").to_list()
-    result = []
+    sort = [("date", DESC), ("_id", DESC)]
+    selected = parse_fields(fields, Exam, required=[f for f, _ in sort])
+    if selected is not None:
+        # Sparse fieldset: no full-document validation
+        docs = await paginate(Exam.find(Exam.patient_id == pid), sort, response, limit, cursor, include_total, projection_model(Exam, selected))
+        return projected_response(docs, response)
     
-    for exam in exams:
-        # Fetch files for this exam
-        # We can query FileRecord by owner_id and owner_type='exam'
-        files = await FileRecord.find(
-            FileRecord.owner_id == str(exam.id),
-            FileRecord.owner_type == "exam"
-        ).to_list()
-        
-        file_dtos = [
-            FileDTO(
-                id=str(f.id), 
-                original_name=f.original_name, 
-                comment=f.comment,
-                created_at=f.created_at
-            ) for f in files
-        ]
-        
-        exam_dict = exam.model_dump()
-        exam_dict['files'] = file_dtos
-        result.append(ExamWithFiles(**exam_dict))
-        
-    return result
+    # File summaries are embedded, the exams are all we need to read
+    return await paginate(Exam.find(Exam.patient_id == pid), sort, response, limit, cursor, include_total)
 
 @router.get("/{id}", response_model=Exam)
 async def get_exam(id: str, user = Depends(get_current_user)):
@@ -114,6 +98,7 @@ async def delete_exam(id: str, user = Depends(get_current_user)):
     if not exam:
         raise HTTPException(status_code=404, detail="Exam not found")
     await exam.delete()
+    await delete_owner_files("exam", str(exam.id))
     return {"message": "Deleted"}
 
 @router.post("/{id}/files")
@@ -128,6 +113,21 @@ async def upload_exam_file(
         raise HTTPException(status_code=404, detail="Exam not found")
     
     record = await save_upload_file(file, "exam", str(exam.id), comment=comment)
-    exam.file_ids.append(str(record.id))
-    await exam.save()
+    await attach_files(exam, [record])
     return record
+
+@router.post("/{id}/files/batch")
+async def upload_exam_files(
+    id: str,
+    files: List[UploadFile] = File(...),
+    comments: List[str] = Form([]),
+    user = Depends(get_current_user)
+):
+    exam = await Exam.get(id)
+    if not exam:
+        raise HTTPException(status_code=404, detail="Exam not found")
+    
+    # comments[i] belongs to files[i]
+    records = await save_upload_files(files, "exam", str(exam.id), comments=comments)
+    await attach_files(exam, records)
+    return records
@@ -1,20 +1,37 @@
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import FileResponse
-from app.models.file_record import FileRecord
-from app.routes.auth import get_current_user
-from app.core.config import settings
-import os
+from fastapi import APIRouter, HTTPException, Request, Response
+from app.core.http import file_response, etag_matches, IMMUTABLE
+from app.services.file_service import get_stored_file
+from app.services.thumbnails import get_thumbnail, snap_width, FORMATS
+import aiofiles.os
 
 router = APIRouter()
 
 @router.get("/{id}")
-async def get_file(id: str):
-    file_record = await FileRecord.get(id)
-    if not file_record:
-        raise HTTPException(status_code=404, detail="File not found")
-    
-    file_path = os.path.join(settings.UPLOAD_DIR, file_record.path)
-    if not os.path.exists(file_path):
-        raise HTTPException(status_code=404, detail="File not found on disk")
-        
-    return FileResponse(file_path, filename=file_record.original_name, media_type=file_record.mime_type)
+async def get_file(id: str, request: Request):
+    stored = await get_stored_file(id)
+    return file_response(
+        request, stored.path, stored.stat, stored.etag,
+        media_type=stored.record.mime_type,
+        filename=stored.record.original_name
+    )
+
+@router.get("/{id}/thumb")
+async def get_file_thumbnail(id: str, request: Request, w: int = 320):
+    stored = await get_stored_file(id)
+
+    # WebP is about a third smaller, for the browsers that accept it
+    fmt = "webp" if "image/webp" in request.headers.get("accept", "") else "jpeg"
+    etag = f'{stored.etag[:-1]}-w{snap_width(w)}.{fmt}"'
+    if etag_matches(request, etag):
+        # Answered before touching the derivative at all
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE, "Vary": "Accept"})
+
+    thumb_path = await get_thumbnail(stored.path, stored.record.mime_type, w, fmt)
+    if not thumb_path:
+        raise HTTPException(status_code=404, detail="No preview available")
+
+    return file_response(
+        request, thumb_path, await aiofiles.os.stat(thumb_path), etag,
+        media_type=FORMATS[fmt],
+        headers={"Vary": "Accept"}
+    )
@@ -1,11 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List, Optional
 from datetime import datetime
 from app.models.patient import Patient, Species
 from app.models.tutor import Tutor
 from app.routes.auth import get_current_user
+from app.services import counters
+from app.services.calendar_cache import calendar_cache
+from app.core.loaders import Loaders, get_loaders
+from app.core.search import build_search_keys, prefix_filter
+from app.core.pagination import paginate, fetch_page, ASC, DESC
+from app.core.projection import parse_fields, projection_model, projected_response
 from pydantic import BaseModel, Field
 from beanie import PydanticObjectId
+from app.models.consultation import Consultation
+from app.models.exam import Exam
+from app.models.prescription import Prescription
+import asyncio
 
 router = APIRouter()
 
@@ -36,11 +46,11 @@ class PatientUpdate(BaseModel):
     tutor2_id: Optional[str] = None
 
 @router.post("/", response_model=Patient)
-async def create_patient(patient_data: PatientCreate, user = Depends(get_current_user)):
+async def create_patient(patient_data: PatientCreate, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
     # Verify tutor exists
     try:
         tutor_oid = PydanticObjectId(patient_data.tutor_id)
-        tutor = await Tutor.get(tutor_oid)
+        tutor = await loaders.tutors.load(tutor_oid)
         if not tutor:
             raise HTTPException(status_code=404, detail="Tutor not found")
     except:
@@ -59,38 +69,102 @@ async def create_patient(patient_data: PatientCreate, user = Depends(get_current
 
     new_patient = Patient(**p_data)
     await new_patient.insert()
+    await counters.increment({counters.PATIENTS: 1})
     return new_patient
 
 @router.get("/", response_model=List[Patient])
-async def get_patients(search: Optional[str] = None, limit: int = 50, skip: int = 0, user = Depends(get_current_user)):
+async def get_patients(
+    response: Response,
+    search: Optional[str] = None,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    user = Depends(get_current_user)
+):
     query = Patient.find_all()
     if search:
-        query = Patient.find({"name": {"$regex": search, "$options": "i"}})
-    return await query.limit(limit).skip(skip).to_list()
+        # Accent-insensitive prefix match on the indexed search keys
+        query = Patient.find(prefix_filter(search) or {})
+    if skip:
+        # Legacy offset paging, prefer the X-Next-Cursor header
+        query = query.skip(skip)
+    sort = [("name", ASC), ("_id", ASC)]
+    selected = parse_fields(fields, Patient, required=[f for f, _ in sort])
+    if selected is None:
+        return await paginate(query, sort, response, limit, cursor, include_total)
+    
+    # Sparse fieldset: projected in Mongo, validated against a small read model
+    docs = await paginate(query, sort, response, limit, cursor, include_total, projection_model(Patient, selected))
+    return projected_response(docs, response)
 
 class PatientWithDetails(Patient):
     tutor: Optional[Tutor] = None
     tutor2: Optional[Tutor] = None
 
 @router.get("/{id}", response_model=PatientWithDetails)
-async def get_patient(id: str, user = Depends(get_current_user)):
-    patient = await Patient.get(id)
+async def get_patient(id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    patient = await loaders.patients.load(id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
     response = PatientWithDetails(**patient.model_dump())
     
-    if patient.tutor_id:
-        response.tutor = await Tutor.get(patient.tutor_id)
-        
-    if patient.tutor2_id:
-        response.tutor2 = await Tutor.get(patient.tutor2_id)
+    # Both tutors are resolved in a single batched query
+    response.tutor, response.tutor2 = await loaders.tutors.load_many([patient.tutor_id, patient.tutor2_id])
         
     return response
 
+@router.get("/{id}/chart")
+async def get_patient_chart(
+    id: str,
+    consultations_limit: int = 20,
+    exams_limit: int = 20,
+    prescriptions_limit: int = 20,
+    user = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
+):
+    """
+    Everything the patient detail view needs in one response. Every section
+    is fetched concurrently; older entries are paged through the regular
+    list endpoints with the returned cursors.
+    """
+    try:
+        pid = PydanticObjectId(id)
+    except Exception:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    sort = [("date", DESC), ("_id", DESC)]
+    patient, consultations, exams, prescriptions = await asyncio.gather(
+        loaders.patients.load(pid),
+        fetch_page(Consultation.find(Consultation.patient_id == pid), sort, consultations_limit),
+        fetch_page(Exam.find(Exam.patient_id == pid), sort, exams_limit),
+        fetch_page(Prescription.find(Prescription.patient_id == pid), sort, prescriptions_limit)
+    )
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+
+    (consultation_docs, consultations_cursor) = consultations
+    (exam_docs, exams_cursor) = exams
+    (prescription_docs, prescriptions_cursor) = prescriptions
+
+    details = PatientWithDetails(**patient.model_dump())
+    details.tutor, details.tutor2 = await loaders.tutors.load_many([patient.tutor_id, patient.tutor2_id])
+
+    return {
+        "patient": details,
+        "consultations": consultation_docs,
+        "consultations_cursor": consultations_cursor,
+        "exams": exam_docs,
+        "exams_cursor": exams_cursor,
+        "prescriptions": prescription_docs,
+        "prescriptions_cursor": prescriptions_cursor
+    }
+
 @router.put("/{id}", response_model=Patient)
-async def update_patient(id: str, update_data: PatientUpdate, user = Depends(get_current_user)):
-    patient = await Patient.get(id)
+async def update_patient(id: str, update_data: PatientUpdate, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    patient = await loaders.patients.load(id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     
@@ -99,14 +173,26 @@ async def update_patient(id: str, update_data: PatientUpdate, user = Depends(get
          data['tutor_id'] = PydanticObjectId(data['tutor_id'])
     if 'tutor2_id' in data and data['tutor2_id']:
          data['tutor2_id'] = PydanticObjectId(data['tutor2_id'])
+    if data.get('name'):
+        data['search_keys'] = build_search_keys(data['name'])
 
+    snapshot_changed = any(k in data and data[k] != getattr(patient, k) for k in ("name", "species"))
     await patient.set(data)
+    if snapshot_changed:
+        # Keep the agenda copy on the patient's consultations in sync
+        await Consultation.get_motor_collection().update_many(
+            {"patient_id": patient.id},
+            {"$set": {"patient_snapshot": {"name": patient.name, "species": patient.species}}}
+        )
+        calendar_cache.invalidate_patient(patient.id)
     return patient
 
 @router.delete("/{id}")
-async def delete_patient(id: str, user = Depends(get_current_user)):
-    patient = await Patient.get(id)
+async def delete_patient(id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    patient = await loaders.patients.load(id)
     if not patient:
         raise HTTPException(status_code=404, detail="Patient not found")
     await patient.delete()
+    await counters.increment({counters.PATIENTS: -1})
+    calendar_cache.invalidate_patient(patient.id)
     return {"message": "Patient deleted"}
@@ -2,13 +2,16 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
 from datetime import datetime
 from app.models.prescription import Prescription, PrescriptionItem
-from app.models.patient import Patient
 from app.models.settings import VetSettings
 from app.routes.auth import get_current_user
+from app.core.loaders import Loaders, get_loaders
 from app.models.user import User
 from pydantic import BaseModel
 from beanie import PydanticObjectId
 from fastapi.responses import Response
+from app.core.pagination import paginate, DESC
+from app.core.projection import parse_fields, projection_model, projected_response
+import asyncio
 
 # For PDF
 from reportlab.pdfgen import canvas
@@ -31,10 +34,10 @@ class PrescriptionUpdate(BaseModel):
     items: Optional[List[PrescriptionItem]] = None
 
 @router.post("/", response_model=Prescription)
-async def create_prescription(data: PrescriptionCreate, user = Depends(get_current_user)):
+async def create_prescription(data: PrescriptionCreate, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
     try:
         pid = PydanticObjectId(data.patient_id)
-        if not await Patient.get(pid):
+        if not await loaders.patients.load(pid):
              raise HTTPException(status_code=404, detail="Patient not found")
     except:
         raise HTTPException(status_code=400, detail="Invalid Patient ID")
@@ -65,12 +68,27 @@ async def create_prescription(data: PrescriptionCreate, user = Depends(get_curre
     return new_p
 
 @router.get("/patient/{patient_id}", response_model=List[Prescription])
-async def get_patient_prescriptions(patient_id: str, user = Depends(get_current_user)):
+async def get_patient_prescriptions(
+    patient_id: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    user = Depends(get_current_user)
+):
     try:
          pid = PydanticObjectId(patient_id)
     except:
         return []
-    return await Prescription.find(Prescription.patient_id == pid).sort("-date").to_list()
+    sort = [("date", DESC), ("_id", DESC)]
+    query = Prescription.find(Prescription.patient_id == pid)
+    selected = parse_fields(fields, Prescription, required=[f for f, _ in sort])
+    if selected is None:
+        return await paginate(query, sort, response, limit, cursor, include_total)
+    
+    docs = await paginate(query, sort, response, limit, cursor, include_total, projection_model(Prescription, selected))
+    return projected_response(docs, response)
 
 @router.get("/{id}", response_model=Prescription)
 async def get_prescription(id: str, user = Depends(get_current_user)):
@@ -100,20 +118,20 @@ async def update_prescription(id: str, data: PrescriptionUpdate, user = Depends(
        
     return p
 
-from app.models.tutor import Tutor
-
 @router.get("/{id}/pdf")
-async def generate_prescription_pdf(id: str, user = Depends(get_current_user)):
+async def generate_prescription_pdf(id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
     p = await Prescription.get(id)
     if not p:
         raise HTTPException(status_code=404, detail="Prescription not found")
     
-    patient = await Patient.get(p.patient_id)
-    tutor = None
-    if patient.tutor_id:
-        tutor = await Tutor.get(patient.tutor_id)
-        
-    vet_settings = await VetSettings.find_one()
+    patient = await loaders.patients.load(p.patient_id)
+    if not patient:
+        raise HTTPException(status_code=404, detail="Patient not found")
+    # Tutor and clinic settings do not depend on each other
+    tutor, vet_settings = await asyncio.gather(
+        loaders.tutors.load(patient.tutor_id),
+        loaders.settings()
+    )
     if not vet_settings:
         vet_settings = VetSettings() # Default
     
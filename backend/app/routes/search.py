@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends
+import asyncio
+from app.models.patient import Patient
+from app.models.tutor import Tutor
+from app.routes.auth import get_current_user
+from app.core.search import prefix_filter, rank
+
+router = APIRouter()
+
+# Candidates fetched per collection before ranking
+CANDIDATES = 50
+
+async def _find(model, query: dict, projection: dict) -> list:
+    return await model.get_motor_collection().find(query, projection).limit(CANDIDATES).to_list(None)
+
+@router.get("/")
+async def search(q: str, limit: int = 10, user = Depends(get_current_user)):
+    """
+    Typeahead over patients and tutors. Matches word prefixes ignoring case
+    and accents ("jose" finds "José") and returns hits ranked by relevance.
+    """
+    query = prefix_filter(q)
+    if not query:
+        return []
+
+    patients, tutors = await asyncio.gather(
+        _find(Patient, query, {"name": 1, "species": 1, "breed": 1, "tutor_id": 1, "search_keys": 1}),
+        _find(Tutor, query, {"full_name": 1, "phone": 1, "email": 1, "search_keys": 1})
+    )
+
+    hits = []
+    for p in patients:
+        hits.append({
+            "type": "patient",
+            "id": str(p["_id"]),
+            "label": p["name"],
+            "sublabel": " · ".join(v for v in [p.get("species"), p.get("breed")] if v),
+            "tutor_id": str(p["tutor_id"]) if p.get("tutor_id") else None,
+            "score": rank(p.get("search_keys", []), q)
+        })
+    for t in tutors:
+        hits.append({
+            "type": "tutor",
+            "id": str(t["_id"]),
+            "label": t["full_name"],
+            "sublabel": t.get("phone") or t.get("email") or "",
+            "score": rank(t.get("search_keys", []), q)
+        })
+
+    hits.sort(key=lambda h: (-h["score"], len(h["label"]), h["label"]))
+    return hits[:limit]
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import List
 from app.models.service import Service
 from app.routes.auth import get_current_user
+from app.core.http import conditional_json_response
+from app.services.reference_cache import services_cache
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -19,13 +21,15 @@ class ServiceUpdate(BaseModel):
     active: bool
 
 @router.get("/", response_model=List[Service])
-async def get_services(user = Depends(get_current_user)):
-    return await Service.find_all().to_list()
+async def get_services(request: Request, user = Depends(get_current_user)):
+    services, etag = await services_cache.get()
+    return conditional_json_response(request, services, etag)
 
 @router.post("/", response_model=Service)
 async def create_service(data: ServiceCreate, user = Depends(get_current_user)):
     service = Service(**data.model_dump())
     await service.insert()
+    services_cache.invalidate()
     return service
 
 @router.put("/{id}", response_model=Service)
@@ -35,6 +39,7 @@ async def update_service(id: str, data: ServiceUpdate, user = Depends(get_curren
         raise HTTPException(status_code=404, detail="Service not found")
     
     await service.set(data.model_dump())
+    services_cache.invalidate()
     return service
 
 @router.delete("/{id}")
@@ -44,4 +49,5 @@ async def delete_service(id: str, user = Depends(get_current_user)):
         raise HTTPException(status_code=404, detail="Service not found")
     
     await service.delete()
+    services_cache.invalidate()
     return {"message": "Deleted"}
@@ -1,8 +1,12 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
 from app.models.settings import VetSettings
 from app.models.user import User
-from app.routes.auth import get_current_user
-from app.services.file_service import save_upload_file
+from app.routes.auth import get_current_user, invalidate_user
+from app.core.http import conditional_json_response
+from app.models.file_record import FileRecord
+from app.models.prescription import Prescription
+from app.services.file_service import save_upload_file, delete_stored_file
+from app.services.reference_cache import settings_cache
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -19,25 +23,33 @@ class SettingsUpdate(BaseModel):
     schedule: Dict[str, str] = {}
 
 @router.get("/")
-async def get_settings(user = Depends(get_current_user)):
-    settings = await VetSettings.find_one()
-    if not settings:
-        settings = VetSettings()
-        await settings.insert()
-    return settings
+async def get_settings(request: Request, user = Depends(get_current_user)):
+    settings, etag = await settings_cache.get()
+    return conditional_json_response(request, settings, etag)
 
 @router.put("/")
 async def update_settings(data: SettingsUpdate, user = Depends(get_current_user)):
+    # Read from the database, the cached instance is shared between requests
     settings = await VetSettings.find_one()
     if not settings:
         settings = VetSettings()
+        await settings.insert()
     
     await settings.set(data.model_dump())
+    settings_cache.invalidate()
     return settings
 
 @router.post("/signature")
 async def upload_signature(file: UploadFile = File(...), user: User = Depends(get_current_user)):
     record = await save_upload_file(file, "user_signature", str(user.id))
-    user.signature_file_id = str(record.id)
-    await user.save()
+    old_file_id = user.signature_file_id
+    # `user` may come from the user cache, write only this field
+    await user.set({"signature_file_id": str(record.id)})
+    invalidate_user(user.email)
+
+    # Prescriptions keep the signature they were issued with
+    if old_file_id and not await Prescription.find(Prescription.signature_file_id == old_file_id).count():
+        old_record = await FileRecord.get(old_file_id)
+        if old_record:
+            await delete_stored_file(old_record)
     return {"message": "Signature updated", "file_id": str(record.id)}
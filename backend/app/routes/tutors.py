@@ -1,8 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List, Optional
-from app.models.tutor import Tutor
+from app.models.tutor import Tutor, tutor_search_keys
 from app.routes.auth import get_current_user
+from app.services import counters
+from app.core.loaders import Loaders, get_loaders
+from app.core.search import prefix_filter
+from app.core.pagination import paginate, ASC, DESC
+from app.core.projection import parse_fields, projection_model, projected_response
 from pydantic import BaseModel, Field
+import asyncio
 
 router = APIRouter()
 
@@ -24,77 +30,113 @@ class TutorUpdate(BaseModel):
 async def create_tutor(tutor: TutorCreate, user = Depends(get_current_user)):
     new_tutor = Tutor(**tutor.model_dump())
     await new_tutor.insert()
+    await counters.increment({counters.TUTORS: 1})
     return new_tutor
 
 @router.get("/", response_model=List[Tutor])
-async def get_tutors(search: Optional[str] = None, limit: int = 50, skip: int = 0, user = Depends(get_current_user)):
+async def get_tutors(
+    response: Response,
+    search: Optional[str] = None,
+    limit: int = 50,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    fields: Optional[str] = None,
+    user = Depends(get_current_user)
+):
     query = Tutor.find_all()
     if search:
-        # Simple regex search for name or phone
-        # Note: In production, consider text index
-        import re
-        pattern = f".*{search}.*"
-        query = Tutor.find({
-            "$or": [
-                {"full_name": {"$regex": pattern, "$options": "i"}},
-                {"phone": {"$regex": pattern, "$options": "i"}}
-            ]
-        })
+        # Accent-insensitive prefix match on name and phone search keys
+        query = Tutor.find(prefix_filter(search) or {})
+    if skip:
+        # Legacy offset paging, prefer the X-Next-Cursor header
+        query = query.skip(skip)
     
-    return await query.limit(limit).skip(skip).to_list()
+    sort = [("full_name", ASC), ("_id", ASC)]
+    selected = parse_fields(fields, Tutor, required=[f for f, _ in sort])
+    if selected is None:
+        return await paginate(query, sort, response, limit, cursor, include_total)
+    
+    # Sparse fieldset: projected in Mongo, validated against a small read model
+    docs = await paginate(query, sort, response, limit, cursor, include_total, projection_model(Tutor, selected))
+    return projected_response(docs, response)
 
 @router.get("/{id}", response_model=Tutor)
-async def get_tutor(id: str, user = Depends(get_current_user)):
-    tutor = await Tutor.get(id)
+async def get_tutor(id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    tutor = await loaders.tutors.load(id)
     if not tutor:
         raise HTTPException(status_code=404, detail="Tutor not found")
     return tutor
 
 @router.put("/{id}", response_model=Tutor)
-async def update_tutor(id: str, update_data: TutorUpdate, user = Depends(get_current_user)):
-    tutor = await Tutor.get(id)
+async def update_tutor(id: str, update_data: TutorUpdate, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    tutor = await loaders.tutors.load(id)
     if not tutor:
         raise HTTPException(status_code=404, detail="Tutor not found")
     
-    await tutor.set(update_data.model_dump(exclude_unset=True))
+    data = update_data.model_dump(exclude_unset=True)
+    if 'full_name' in data or 'phone' in data:
+        data['search_keys'] = tutor_search_keys(
+            data.get('full_name') or tutor.full_name,
+            data.get('phone') or tutor.phone
+        )
+    await tutor.set(data)
     return tutor
 
 @router.delete("/{id}")
-async def delete_tutor(id: str, user = Depends(get_current_user)):
-    tutor = await Tutor.get(id)
+async def delete_tutor(id: str, user = Depends(get_current_user), loaders: Loaders = Depends(get_loaders)):
+    tutor = await loaders.tutors.load(id)
     if not tutor:
         raise HTTPException(status_code=404, detail="Tutor not found")
     
     await tutor.delete()
+    await counters.increment({counters.TUTORS: -1})
     return {"message": "Tutor deleted"}
 
 @router.get("/{id}/details")
-async def get_tutor_details(id: str, user = Depends(get_current_user)):
-    tutor = await Tutor.get(id)
+async def get_tutor_details(
+    id: str,
+    response: Response,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    patients_limit: int = 100,
+    user = Depends(get_current_user),
+    loaders: Loaders = Depends(get_loaders)
+):
+    tutor = await loaders.tutors.load(id)
     if not tutor:
         raise HTTPException(status_code=404, detail="Tutor not found")
     
-    # Get all patients for this tutor
-    from app.models.patient import Patient
-    patients = await Patient.find(
-        {"$or": [{"tutor_id": tutor.id}, {"tutor2_id": tutor.id}]}
-    ).to_list()
+    # Get the patients for this tutor: every id for the stats, summaries for display
+    from app.models.patient import Patient, PatientSummary
+    from app.models.consultation import Consultation, ConsultationSummary
+    owned = {"$or": [{"tutor_id": tutor.id}, {"tutor2_id": tutor.id}]}
+    patient_ids, patients = await asyncio.gather(
+        Patient.get_motor_collection().distinct("_id", owned),
+        Patient.find(owned).sort("name").limit(patients_limit).project(PatientSummary).to_list()
+    )
     
-    # Get consultations for these patients
-    from app.models.consultation import Consultation
-    patient_ids = [p.id for p in patients]
-    consultations = await Consultation.find(
-        {"patient_id": {"$in": patient_ids}}
-    ).sort("-date").to_list()
+    # Stats come from a single $group, consultations as a paginated summary
+    by_patient = Consultation.find({"patient_id": {"$in": patient_ids}})
+    status_counts, consultations = await asyncio.gather(
+        by_patient.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]).to_list(),
+        paginate(
+            Consultation.find({"patient_id": {"$in": patient_ids}}),
+            [("date", DESC), ("_id", DESC)],
+            response, limit, cursor,
+            projection_model=ConsultationSummary
+        )
+    )
     
-    # Calculate stats
-    total_appointments = len(consultations)
-    attended = len([c for c in consultations if c.status == "attended"])
-    no_shows = len([c for c in consultations if c.status == "no_show"])
+    counts = {row["_id"]: row["count"] for row in status_counts}
+    total_appointments = sum(counts.values())
+    attended = counts.get("attended", 0)
+    no_shows = counts.get("no_show", 0)
     
     return {
         "tutor": tutor,
         "patients": patients,
+        "total_patients": len(patient_ids),
         "consultations": consultations,
         "stats": {
             "total_appointments": total_appointments,
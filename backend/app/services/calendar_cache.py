@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.http import json_etag
+
+Month = Tuple[int, int]
+# Loads the (date, event) pairs of the consultations in [start, end)
+MonthLoader = Callable[[datetime, datetime], Awaitable[List[Tuple[datetime, dict]]]]
+
+def to_utc_naive(d: datetime) -> datetime:
+    # Consultation dates are stored as naive UTC
+    if d.tzinfo is None:
+        return d
+    return d.astimezone(timezone.utc).replace(tzinfo=None)
+
+def month_of(d: datetime) -> Month:
+    d = to_utc_naive(d)
+    return (d.year, d.month)
+
+def month_bounds(month: Month) -> Tuple[datetime, datetime]:
+    year, m = month
+    start = datetime(year, m, 1)
+    end = datetime(year + 1, 1, 1) if m == 12 else datetime(year, m + 1, 1)
+    return start, end
+
+def months_between(start: datetime, end: datetime) -> List[Month]:
+    months = []
+    month, last = month_of(start), month_of(end)
+    while month <= last:
+        months.append(month)
+        year, m = month
+        month = (year + 1, 1) if m == 12 else (year, m + 1)
+    return months
+
+class CalendarCache:
+    """
+    Agenda events cached per calendar month. Writers invalidate only the
+    months they touch; a version per month keeps a load that raced with an
+    invalidation from being stored. The TTL bounds how long another
+    worker's write can go unnoticed.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._versions: Dict[Month, int] = {}
+        self._cached: Set[Month] = set()
+        self._loading: Dict[Month, int] = {}
+
+    async def month(self, month: Month, loader: MonthLoader) -> Tuple[List[Tuple[datetime, dict]], str]:
+        cached = self._buckets.get(month)
+        if cached is not None:
+            return cached
+
+        version = self._versions.get(month, 0)
+        self._loading[month] = self._loading.get(month, 0) + 1
+        try:
+            rows = await loader(*month_bounds(month))
+        finally:
+            self._loading[month] -= 1
+            if not self._loading[month]:
+                del self._loading[month]
+
+        bucket = (rows, json_etag([event for _, event in rows]))
+        if self._versions.get(month, 0) == version:
+            self._buckets.set(month, bucket)
+            self._cached.add(month)
+        return bucket
+
+    async def events(self, start: datetime, end: datetime, loader: MonthLoader) -> Tuple[List[dict], str]:
+        """
+        Events with start <= date <= end assembled from the month buckets,
+        and an ETag derived from the range and the buckets' ETags.
+        """
+        start, end = to_utc_naive(start), to_utc_naive(end)
+        events, etags = [], [start.isoformat(), end.isoformat()]
+        for month in months_between(start, end):
+            rows, etag = await self.month(month, loader)
+            etags.append(etag)
+            events.extend(event for date, event in rows if start <= date <= end)
+        return events, json_etag(etags)
+
+    def invalidate(self, *dates: Optional[datetime]):
+        for d in dates:
+            if d is not None:
+                self._drop(month_of(d))
+
+    def invalidate_patient(self, patient_id: Any):
+        """
+        Drops the months holding an event of the patient, e.g. after a rename.
+        """
+        patient_id = str(patient_id)
+        # Loads in flight may have read the old values, drop them too
+        for month in list(self._loading):
+            self._drop(month)
+        for month in list(self._cached):
+            bucket = self._buckets.get(month)
+            if bucket is None:
+                self._cached.discard(month)
+            elif any(event["patient_id"] == patient_id for _, event in bucket[0]):
+                self._drop(month)
+
+    def clear(self):
+        for month in set(self._loading) | self._cached:
+            self._drop(month)
+
+    def _drop(self, month: Month):
+        self._versions[month] = self._versions.get(month, 0) + 1
+        self._buckets.pop(month)
+        self._cached.discard(month)
+
+calendar_cache = CalendarCache(
+    maxsize=settings.CALENDAR_CACHE_SIZE,
+    ttl=settings.CALENDAR_CACHE_RELAY_TTL_SECONDS if settings.EVENTS_CHANGE_STREAM else settings.CALENDAR_CACHE_TTL_SECONDS
+)
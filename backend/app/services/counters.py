@@ -0,0 +1,106 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+from beanie.operators import In
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+from app.core.config import settings
+from app.models.dashboard_counter import DashboardCounter
+from app.models.patient import Patient
+from app.models.tutor import Tutor
+from app.models.consultation import Consultation
+from app.services.calendar_cache import to_utc_naive
+from app.services.scheduler import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+PATIENTS = "patients"
+TUTORS = "tutors"
+
+# Days around today whose consultation counts the reconciliation recomputes
+RECONCILE_PAST_DAYS = 7
+RECONCILE_FUTURE_DAYS = 60
+# Not a counter: its value is the epoch second the current reconciliation
+# lease expires at, so one worker reconciles per interval
+RECONCILE_LEASE = "reconcile-lease"
+
+def consultations_key(date: datetime) -> str:
+    # Days are UTC, like the dates the consultations are stored with
+    return f"consultations:{to_utc_naive(date).strftime('%Y-%m-%d')}"
+
+async def increment(changes: Dict[str, int]):
+    """
+    Applies {counter: delta} atomically with $inc, creating missing counters.
+    """
+    ops = [
+        UpdateOne({"_id": key}, {"$inc": {"value": delta}}, upsert=True)
+        for key, delta in changes.items() if delta
+    ]
+    if ops:
+        await DashboardCounter.get_motor_collection().bulk_write(ops, ordered=False)
+
+async def read_counters(keys: List[str]) -> Dict[str, int]:
+    counters = await DashboardCounter.find(In(DashboardCounter.id, keys)).to_list()
+    values = {key: 0 for key in keys}
+    values.update({c.id: c.value for c in counters})
+    return values
+
+async def _acquire_lease(seconds: int) -> bool:
+    now = int(time.time())
+    try:
+        await DashboardCounter.get_motor_collection().update_one(
+            {"_id": RECONCILE_LEASE, "value": {"$lt": now}},
+            {"$set": {"value": now + seconds}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        # Held by another worker
+        return False
+    return True
+
+async def reconcile_counters():
+    """
+    Recomputes the totals and the consultations per day near today from the
+    collections, correcting any drift of the incremental updates.
+    Corrections are applied with $inc so updates made meanwhile aren't
+    overwritten, and a lease keeps the other workers from applying them twice.
+    """
+    if not await _acquire_lease(settings.COUNTERS_RECONCILE_MINUTES * 60 - 30):
+        return
+
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    start = today - timedelta(days=RECONCILE_PAST_DAYS)
+    end = today + timedelta(days=RECONCILE_FUTURE_DAYS + 1)
+
+    values = {
+        PATIENTS: await Patient.get_motor_collection().count_documents({}),
+        TUTORS: await Tutor.get_motor_collection().count_documents({}),
+    }
+    day = start
+    while day < end:
+        values[consultations_key(day)] = 0
+        day += timedelta(days=1)
+
+    per_day = await Consultation.get_motor_collection().aggregate([
+        {"$match": {"date": {"$gte": start, "$lt": end}}},
+        {"$group": {
+            "_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}},
+            "count": {"$sum": 1}
+        }}
+    ]).to_list(None)
+    for row in per_day:
+        values[f"consultations:{row['_id']}"] = row["count"]
+
+    current = await read_counters(list(values))
+    drift = {key: value - current[key] for key, value in values.items() if current[key] != value}
+    if drift:
+        logger.info(f"Reconciling {len(drift)} dashboard counters")
+        await increment(drift)
+
+counters_task = PeriodicTask(
+    "dashboard-counters",
+    interval=settings.COUNTERS_RECONCILE_MINUTES * 60,
+    fn=reconcile_counters,
+    initial_delay=5
+)
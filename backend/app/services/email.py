@@ -1,51 +1,283 @@
 import logging
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
+import queue
+import smtplib
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from typing import Dict, List, Optional, Tuple
 from app.core.config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@dataclass
+class EmailMessage:
+    to_email: str
+    subject: str
+    body: str
+    html_body: Optional[str] = None
+
+def _sender_email() -> str:
+    return settings.MAIL_FROM or settings.MAIL_USERNAME or "no-reply@pattyvet.cl"
+
+class BatchSendError(Exception):
+    """
+    Raised by send_batch when it stops partway. `pending` holds the indexes
+    of the messages that were not delivered; every other one was.
+    """
+
+    def __init__(self, pending: List[int], error: Exception):
+        super().__init__(str(error))
+        self.pending = pending
+        self.error = error
+
+class EmailTransport(ABC):
+    """
+    Base class for email backends. Transports are long-lived and shared, so
+    implementations must be safe to call from several threads.
+    """
+
+    @abstractmethod
+    def send(self, message: EmailMessage):
+        ...
+
+    def send_batch(self, messages: List[EmailMessage]):
+        for i, message in enumerate(messages):
+            try:
+                self.send(message)
+            except Exception as e:
+                raise BatchSendError(list(range(i, len(messages))), e) from e
+
+    def close(self):
+        pass
+
+class BrevoTransport(EmailTransport):
+    """
+    Sends through the Brevo (Sendinblue) API with a single pooled API client.
+    """
+
+    # Brevo accepts at most this many message versions per call
+    MAX_VERSIONS = 1000
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+        self._api = None
+        self._lock = threading.Lock()
+
+    @property
+    def api(self):
+        if self._api is None:
+            with self._lock:
+                if self._api is None:
+                    import sib_api_v3_sdk
+                    configuration = sib_api_v3_sdk.Configuration()
+                    configuration.api_key['api-key'] = self.api_key
+                    self._api = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+        return self._api
+
+    def send(self, message: EmailMessage):
+        import sib_api_v3_sdk
+        # Note: Brevo requires the sender email to be verified.
+        email = sib_api_v3_sdk.SendSmtpEmail(
+            to=[{"email": message.to_email}],
+            sender={"name": "PattyVet", "email": _sender_email()},
+            subject=message.subject,
+            html_content=message.html_body if message.html_body else message.body,
+            text_content=message.body
+        )
+        self.api.send_transac_email(email)
+        logger.info(f"Email sent successfully via Brevo to {message.to_email}")
+
+    def send_batch(self, messages: List[EmailMessage]):
+        """
+        Only identical messages (same subject and content) are merged into
+        one API call, with one message version per recipient. Our emails are
+        personalized pre-rendered HTML, which message versions can't carry,
+        so those still go out one call each over the pooled client.
+        """
+        import sib_api_v3_sdk
+        groups: Dict[Tuple[str, str, Optional[str]], List[int]] = {}
+        for i, message in enumerate(messages):
+            groups.setdefault((message.subject, message.body, message.html_body), []).append(i)
+
+        chunks = [
+            indexes[i:i + self.MAX_VERSIONS]
+            for indexes in groups.values()
+            for i in range(0, len(indexes), self.MAX_VERSIONS)
+        ]
+        for n, chunk in enumerate(chunks):
+            try:
+                if len(chunk) == 1:
+                    self.send(messages[chunk[0]])
+                    continue
+                first = messages[chunk[0]]
+                email = sib_api_v3_sdk.SendSmtpEmail(
+                    sender={"name": "PattyVet", "email": _sender_email()},
+                    subject=first.subject,
+                    html_content=first.html_body if first.html_body else first.body,
+                    text_content=first.body,
+                    message_versions=[{"to": [{"email": messages[i].to_email}]} for i in chunk]
+                )
+                self.api.send_transac_email(email)
+                logger.info(f"Batch of {len(chunk)} emails sent via Brevo")
+            except Exception as e:
+                pending = sorted(i for rest in chunks[n:] for i in rest)
+                raise BatchSendError(pending, e) from e
+
+class SMTPTransport(EmailTransport):
+    """
+    Sends over SMTP keeping a small pool of authenticated connections open.
+    """
+
+    def __init__(self, host: str, port: int, username: str = None, password: str = None,
+                 use_ssl: bool = True, starttls: bool = False, pool_size: int = 2):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_ssl = use_ssl
+        self.starttls = starttls
+        self._pool: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self) -> smtplib.SMTP:
+        if self.use_ssl:
+            server = smtplib.SMTP_SSL(self.host, self.port)
+        else:
+            server = smtplib.SMTP(self.host, self.port)
+            if self.starttls:
+                server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    def _acquire(self) -> smtplib.SMTP:
+        try:
+            server = self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+        try:
+            # Servers drop idle connections, check before reusing
+            if server.noop()[0] == 250:
+                return server
+        except smtplib.SMTPException:
+            pass
+        self._quit(server)
+        return self._connect()
+
+    def _release(self, server: smtplib.SMTP):
+        try:
+            self._pool.put_nowait(server)
+        except queue.Full:
+            self._quit(server)
+
+    def _quit(self, server: smtplib.SMTP):
+        try:
+            server.quit()
+        except Exception:
+            pass
+
+    def _to_mime(self, message: EmailMessage) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['From'] = _sender_email()
+        msg['To'] = message.to_email
+        msg['Subject'] = message.subject
+        msg.attach(MIMEText(message.body, 'plain'))
+        if message.html_body:
+            msg.attach(MIMEText(message.html_body, 'html'))
+        return msg
+
+    def send(self, message: EmailMessage):
+        self.send_batch([message])
+
+    def send_batch(self, messages: List[EmailMessage]):
+        # Every message of the batch goes through one connection
+        try:
+            server = self._acquire()
+        except Exception as e:
+            raise BatchSendError(list(range(len(messages))), e) from e
+        for i, message in enumerate(messages):
+            try:
+                server.send_message(self._to_mime(message))
+            except Exception as e:
+                self._quit(server)
+                raise BatchSendError(list(range(i, len(messages))), e) from e
+        self._release(server)
+
+    def close(self):
+        while not self._pool.empty():
+            self._quit(self._pool.get_nowait())
+
+class InMemoryTransport(EmailTransport):
+    """
+    Offline transport that records messages instead of sending them.
+    """
+
+    def __init__(self):
+        self.sent: List[EmailMessage] = []
+        self.batches: List[List[EmailMessage]] = []
+        self._lock = threading.Lock()
+
+    def send(self, message: EmailMessage):
+        self.send_batch([message])
+
+    def send_batch(self, messages: List[EmailMessage]):
+        with self._lock:
+            self.sent.extend(messages)
+            self.batches.append(list(messages))
+
+    def clear(self):
+        with self._lock:
+            self.sent.clear()
+            self.batches.clear()
+
+_transports: Dict[str, EmailTransport] = {}
+_transports_lock = threading.Lock()
+
+def get_smtp_transport() -> SMTPTransport:
+    with _transports_lock:
+        if "smtp" not in _transports:
+            _transports["smtp"] = SMTPTransport(
+                host=settings.MAIL_SERVER,
+                port=settings.MAIL_PORT,
+                username=settings.MAIL_USERNAME if settings.USE_CREDENTIALS else None,
+                password=settings.MAIL_PASSWORD if settings.USE_CREDENTIALS else None,
+                use_ssl=settings.MAIL_SSL_TLS,
+                starttls=settings.MAIL_STARTTLS
+            )
+        return _transports["smtp"]
+
+def get_transport() -> EmailTransport:
+    """
+    Returns the shared transport selected by EMAIL_TRANSPORT.
+    """
+    name = settings.EMAIL_TRANSPORT
+    if name == "smtp":
+        return get_smtp_transport()
+
+    with _transports_lock:
+        if name not in _transports:
+            if name == "memory":
+                _transports[name] = InMemoryTransport()
+            elif name == "brevo":
+                if not settings.BREVO_API_KEY:
+                    raise RuntimeError("BREVO_API_KEY is not set. Cannot send email.")
+                _transports[name] = BrevoTransport(settings.BREVO_API_KEY)
+            else:
+                raise ValueError(f"Unknown EMAIL_TRANSPORT: {name}")
+        return _transports[name]
+
+def close_transports():
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
 def send_email_sync(to_email: str, subject: str, body: str, html_body: str = None):
     """
-    Sends an email using Brevo (Sendinblue) API.
-    """
-    api_key = settings.BREVO_API_KEY
-    if not api_key:
-        logger.error("BREVO_API_KEY is not set. Cannot send email.")
-        print("DEBUG: Missing BREVO_API_KEY")
-        return
-
-    # Configure API key authorization: api-key
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = api_key
-
-    # Create an instance of the API class
-    api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
-    
-    # Define sender (must be verified in Brevo provided user uses that domain)
-    # Using the MAIL_FROM setting or a fallback. 
-    # Note: Brevo requires the sender email to be verified.
-    sender = {"name": "PattyVet", "email": settings.MAIL_FROM or settings.MAIL_USERNAME or "no-reply@pattyvet.cl"}
-    to = [{"email": to_email}]
-    
-    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-        to=to,
-        sender=sender,
-        subject=subject,
-        html_content=html_body if html_body else body,
-        text_content=body
-    )
-
-    print(f"DEBUG: Attempting to send email via Brevo to: {to_email}")
-
-    try:
-        api_response = api_instance.send_transac_email(send_smtp_email)
-        print(f"DEBUG: Brevo API Response: {api_response}")
-        logger.info(f"Email sent successfully via Brevo to {to_email}")
-    except ApiException as e:
-        logger.error(f"Failed to send email via Brevo: {e}")
-        print(f"DEBUG: FAILED to send email via Brevo. Error: {e}")
-        import traceback
-        traceback.print_exc()
+    Sends an email right away through the configured transport.
+    """
+    get_transport().send(EmailMessage(to_email, subject, body, html_body))
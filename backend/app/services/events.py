@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class EventBroker:
+    """
+    In-process pub/sub for agenda deltas. Each subscriber gets a bounded
+    queue; a client too slow to keep up loses its oldest events rather
+    than holding memory or slowing the publishers.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def publish(self, event: dict):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+broker = EventBroker()
+
+def _iso(d: Optional[datetime]) -> Optional[str]:
+    if d is None:
+        return None
+    return d.isoformat() + 'Z' if d.tzinfo is None else d.isoformat()
+
+def consultation_event(kind: str, con: Any) -> dict:
+    """
+    Small delta describing a consultation change, from a Consultation
+    document or a raw change stream document.
+    """
+    doc = con if isinstance(con, dict) else con.model_dump(by_alias=True)
+    snapshot = doc.get("patient_snapshot") or {}
+    return {
+        "type": f"consultation.{kind}",
+        "id": str(doc.get("_id") or doc.get("id")),
+        "patient_id": str(doc["patient_id"]) if doc.get("patient_id") else None,
+        "patient_name": snapshot.get("name"),
+        "date": _iso(doc.get("date")),
+        "reason": doc.get("reason"),
+        "status": doc.get("status")
+    }
+
+def publish_consultation(kind: str, con: Any):
+    """
+    Publishes a consultation change from a route. With the change stream
+    relay on, every worker receives it from Mongo instead.
+    """
+    if not settings.EVENTS_CHANGE_STREAM:
+        broker.publish(consultation_event(kind, con))
+
+class ChangeStreamRelay:
+    """
+    Feeds the broker of this worker from a Mongo change stream on the
+    consultations collection, so clients connected to any worker see
+    changes made through the others. Needs a replica set.
+    """
+
+    OPERATIONS = {"insert": "created", "update": "updated", "replace": "updated", "delete": "deleted"}
+
+    def __init__(self, retry_delay: float = 5):
+        self.retry_delay = retry_delay
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        from app.models.consultation import Consultation
+        from app.services.calendar_cache import calendar_cache
+
+        while True:
+            try:
+                async with Consultation.get_motor_collection().watch(
+                    [{"$match": {"operationType": {"$in": list(self.OPERATIONS)}}}],
+                    full_document="updateLookup"
+                ) as stream:
+                    # The driver resumes on transient errors by itself
+                    async for change in stream:
+                        doc = change.get("fullDocument") or {"_id": change["documentKey"]["_id"]}
+                        # Writes of other workers also stale this worker's calendar.
+                        # Deletes and date moves don't tell the old month, drop them all
+                        moved = "date" in (change.get("updateDescription") or {}).get("updatedFields", {})
+                        if change["operationType"] in ("delete", "replace") or moved:
+                            calendar_cache.clear()
+                        else:
+                            calendar_cache.invalidate(doc.get("date"))
+                        broker.publish(consultation_event(self.OPERATIONS[change["operationType"]], doc))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Consultation change stream failed, retrying: {e}")
+                await asyncio.sleep(self.retry_delay)
+
+relay = ChangeStreamRelay()
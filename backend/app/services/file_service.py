@@ -1,44 +1,247 @@
-import shutil
+import asyncio
+import hashlib
 import os
 import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional
+import aiofiles
+import aiofiles.os
 from fastapi import UploadFile, HTTPException
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.models.file_record import FileRecord
+from app.models.file_blob import FileBlob
+from app.models.file_record import FileRecord, FileSummary
+from app.services.thumbnails import remove_thumbnails
+from app.services.storage import shard_path, resolve_path
 
 ALLOWED_MIME_TYPES = ["application/pdf", "image/jpeg", "image/png", "image/jpg"]
 MAX_FILE_SIZE = 10 * 1024 * 1024 # 10MB
+MAX_BATCH_SIZE = 50 * 1024 * 1024 # 50MB per batch request
+CHUNK_SIZE = 1024 * 1024
+# A blob claim older than this was left by a crashed worker
+BLOB_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+@dataclass
+class StoredFile:
+    record: FileRecord
+    path: str
+    stat: os.stat_result
+    etag: str
+
+# Per worker: deletes only evict here, other workers rely on the short TTL
+# and on the path check of every hit
+_metadata_cache = TTLCache(maxsize=settings.FILE_METADATA_CACHE_SIZE, ttl=settings.FILE_METADATA_CACHE_TTL_SECONDS)
+
+async def get_stored_file(file_id: str) -> Optional[StoredFile]:
+    """
+    Record, disk path, stat and strong ETag of a stored file, cached in
+    process. Raises 404 when the record or its file is missing.
+    """
+    stored = _metadata_cache.get(file_id)
+    if stored is not None:
+        # The file may have been deleted or moved by another worker
+        if await aiofiles.os.path.exists(stored.path):
+            return stored
+        _metadata_cache.pop(file_id)
+
+    try:
+        record = await FileRecord.get(file_id)
+    except Exception:
+        record = None
+    if not record:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    path = await asyncio.to_thread(resolve_path, record.path)
+    try:
+        stat = await aiofiles.os.stat(path)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="File not found on disk")
+
+    etag = f'"{record.sha256}"' if record.sha256 else f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    stored = StoredFile(record=record, path=path, stat=stat, etag=etag)
+    _metadata_cache.set(file_id, stored)
+    return stored
 
 async def save_upload_file(file: UploadFile, owner_type: str, owner_id: str, comment: str = None) -> FileRecord:
     if file.content_type not in ALLOWED_MIME_TYPES:
         raise HTTPException(status_code=400, detail="Invalid file type")
-    
-    # Check size? FastAPI doesn't easily give size before read, but we can check after read or stream.
-    # For simplicity, we trust stream or check length if Content-Length header exists.
+    if file.size is not None and file.size > MAX_FILE_SIZE:
+        raise HTTPException(status_code=413, detail="File too large")
     
     ext = file.filename.split(".")[-1]
-    filename = f"{uuid.uuid4()}.{ext}"
-    file_path = os.path.join(settings.UPLOAD_DIR, filename)
+    part_path = os.path.join(settings.UPLOAD_DIR, f"{uuid.uuid4()}.part")
     
     # Ensure upload dir exists
-    os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+    await aiofiles.os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
     
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    # Get size
-    size = os.path.getsize(file_path)
-    if size > MAX_FILE_SIZE:
-        os.remove(file_path)
-        raise HTTPException(status_code=400, detail="File too large")
+    # Streamed in chunks: size checked and hash computed as the bytes arrive
+    size = 0
+    digest = hashlib.sha256()
+    try:
+        async with aiofiles.open(part_path, "wb") as buffer:
+            while chunk := await file.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(status_code=413, detail="File too large")
+                digest.update(chunk)
+                await buffer.write(chunk)
+        filename = await store_blob(part_path, digest.hexdigest(), ext, size)
+    finally:
+        if await aiofiles.os.path.exists(part_path):
+            await aiofiles.os.remove(part_path)
         
     file_record = FileRecord(
         owner_type=owner_type,
         owner_id=owner_id,
-        path=filename, # Store relative filename
+        path=filename, # Relative path of the shared blob
         original_name=file.filename,
         mime_type=file.content_type,
         size=size,
+        sha256=digest.hexdigest(),
         comment=comment
     )
-    await file_record.insert()
+    try:
+        await file_record.insert()
+    except BaseException:
+        # Give back the reference taken for this record
+        await release_blob(file_record)
+        raise
     return file_record
+
+async def store_blob(part_path: str, sha256: str, ext: str, size: int) -> str:
+    """
+    Takes a reference on the blob with this content, moving the uploaded
+    file into place when the content is new. Returns the blob's path.
+    """
+    while True:
+        now = datetime.utcnow()
+        try:
+            # A blob claimed for deletion can't be reused until it's gone
+            blob = await FileBlob.get_motor_collection().find_one_and_update(
+                {"_id": sha256, "$or": [
+                    {"claimed_at": None},
+                    {"claimed_at": {"$lt": now - BLOB_CLAIM_TIMEOUT}}
+                ]},
+                {
+                    "$inc": {"ref_count": 1},
+                    "$unset": {"claimed_at": ""},
+                    "$setOnInsert": {"path": shard_path(f"{sha256}.{ext}"), "size": size, "created_at": now}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            break
+        except DuplicateKeyError:
+            await asyncio.sleep(0.05)
+    blob_path = await asyncio.to_thread(resolve_path, blob["path"])
+    if blob["ref_count"] == 1 or not await aiofiles.os.path.exists(blob_path):
+        # Same content, so replacing an existing copy is harmless
+        await aiofiles.os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        await aiofiles.os.replace(part_path, blob_path)
+    return blob["path"]
+
+async def release_blob(record: FileRecord):
+    """
+    Drops the record's reference on its blob and unlinks the file with the
+    last one. Records stored before deduplication own their file.
+    """
+    if record.sha256:
+        blob = await FileBlob.get_motor_collection().find_one_and_update(
+            {"_id": record.sha256},
+            {"$inc": {"ref_count": -1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if blob is not None:
+            if blob["ref_count"] <= 0:
+                await reclaim_blob(record.sha256)
+            return
+    await _unlink(record.path)
+
+async def reclaim_blob(sha256: str):
+    """
+    Removes an unreferenced blob and its file. The blob is claimed before
+    the file is unlinked and deleted only afterwards, so a concurrent
+    upload of the same content waits in store_blob instead of having its
+    fresh file deleted under it. A blob claimed by someone else (or
+    referenced again) is left alone; its claimant checks again when done.
+    """
+    blobs = FileBlob.get_motor_collection()
+    claim = datetime.utcnow()
+    blob = await blobs.find_one_and_update(
+        {"_id": sha256, "ref_count": {"$lte": 0}, "claimed_at": None},
+        {"$set": {"claimed_at": claim}},
+        return_document=ReturnDocument.AFTER
+    )
+    if blob is None:
+        return
+    await _unlink(blob["path"])
+    await blobs.delete_one({"_id": sha256, "claimed_at": claim})
+
+async def _unlink(relative: str):
+    file_path = await asyncio.to_thread(resolve_path, relative)
+    try:
+        await aiofiles.os.remove(file_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error deleting file from disk: {e}")
+    await asyncio.to_thread(remove_thumbnails, file_path)
+
+async def save_upload_files(
+    files: List[UploadFile],
+    owner_type: str,
+    owner_id: str,
+    comments: Optional[List[str]] = None
+) -> List[FileRecord]:
+    """
+    Stores several uploads concurrently. If any of them fails, the ones
+    already stored are removed and the first error is raised.
+    """
+    comments = comments or []
+    results = await asyncio.gather(*[
+        save_upload_file(f, owner_type, owner_id, comment=(comments[i] if i < len(comments) else None) or None)
+        for i, f in enumerate(files)
+    ], return_exceptions=True)
+
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        await asyncio.gather(*[delete_stored_file(r) for r in results if isinstance(r, FileRecord)])
+        raise errors[0]
+    return results
+
+async def delete_stored_file(record: FileRecord):
+    await record.delete()
+    _metadata_cache.pop(str(record.id))
+    await release_blob(record)
+
+async def delete_owner_files(owner_type: str, owner_id: str):
+    """
+    Removes every file stored for a deleted exam or consultation.
+    """
+    records = await FileRecord.find(
+        FileRecord.owner_type == owner_type,
+        FileRecord.owner_id == owner_id
+    ).to_list()
+    await asyncio.gather(*[delete_stored_file(r) for r in records])
+
+async def attach_files(owner, records: List[FileRecord]):
+    """
+    Adds stored files to their owning exam or consultation, together with
+    the embedded summaries its lists display.
+    """
+    await owner.get_motor_collection().update_one(
+        {"_id": owner.id},
+        {"$push": {
+            "file_ids": {"$each": [str(r.id) for r in records]},
+            "files": {"$each": [FileSummary.from_record(r).model_dump() for r in records]}
+        }}
+    )
+
+async def detach_file(owner, file_id: str):
+    await owner.get_motor_collection().update_one(
+        {"_id": owner.id},
+        {"$pull": {"file_ids": file_id, "files": {"id": file_id}}}
+    )
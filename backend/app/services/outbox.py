@@ -0,0 +1,209 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo.errors import BulkWriteError
+from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.services.email import BatchSendError, EmailMessage, EmailTransport, get_transport
+
+logger = logging.getLogger(__name__)
+
+class EmailDispatcher:
+    """
+    Drains the email outbox in the background. Messages are claimed in
+    batches with a lease so several workers can share one outbox, handed to
+    the transport in a single batch call, and retried with exponential
+    backoff until max_attempts.
+    """
+
+    def __init__(
+        self,
+        transport: EmailTransport = None,
+        concurrency: int = 4,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+        base_delay: float = 30,
+        max_delay: float = 3600,
+        poll_interval: float = 15,
+        lease: float = 300,
+    ):
+        self._transport = transport
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def transport(self) -> EmailTransport:
+        return self._transport or get_transport()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.error(f"Email outbox dispatcher error: {e}")
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def drain(self) -> int:
+        """
+        Sends every message that is due. Returns how many were processed.
+        """
+        processed = 0
+        while True:
+            batch = await self._claim()
+            if not batch:
+                return processed
+            await self._deliver(batch)
+            processed += len(batch)
+
+    async def _claim(self) -> List[dict]:
+        collection = EmailOutbox.get_motor_collection()
+        now = datetime.utcnow()
+        due = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            # Messages left behind by a worker that died mid-send
+            {"status": "sending", "locked_until": {"$lt": now}},
+        ]}
+
+        candidates = await collection.find(due, {"_id": 1}).sort("next_attempt_at", 1).limit(self.batch_size).to_list(None)
+        if not candidates:
+            return []
+
+        # Another worker may claim some of the candidates first, the token
+        # tells us which ones we actually won.
+        token = uuid.uuid4().hex
+        await collection.update_many(
+            {"$and": [{"_id": {"$in": [c["_id"] for c in candidates]}}, due]},
+            {"$set": {
+                "status": "sending",
+                "claim_token": token,
+                "locked_until": now + timedelta(seconds=self.lease)
+            }}
+        )
+        return await collection.find({"claim_token": token}).to_list(None)
+
+    async def _deliver(self, batch: List[dict]):
+        messages = [
+            EmailMessage(m["to_email"], m["subject"], m["body"], m.get("html_body"))
+            for m in batch
+        ]
+        pending: List[dict] = []
+        try:
+            # Provider SDKs are blocking, keep them off the event loop
+            await asyncio.to_thread(self.transport.send_batch, messages)
+        except BatchSendError as e:
+            pending = [batch[i] for i in e.pending]
+            error = e.error
+        except Exception as e:
+            # No detail from the transport, nothing is known to be delivered
+            pending = batch
+            error = e
+
+        # Whatever went out before the failure must not be sent twice
+        await self._mark_sent([m for m in batch if not any(m is p for p in pending)])
+        if not pending:
+            return
+
+        if len(batch) == 1:
+            await self._mark_failed(pending[0], error)
+            return
+        # Retry the rest one by one so a single bad address doesn't fail them all
+        logger.warning(f"Batch send failed ({error}), retrying {len(pending)} messages individually")
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def deliver_one(message: dict):
+            async with slots:
+                await self._deliver([message])
+
+        await asyncio.gather(*[deliver_one(m) for m in pending])
+
+    async def _mark_sent(self, messages: List[dict]):
+        if not messages:
+            return
+        await EmailOutbox.get_motor_collection().update_many(
+            {"_id": {"$in": [m["_id"] for m in messages]}},
+            {"$set": {"status": "sent", "sent_at": datetime.utcnow(), "locked_until": None},
+             "$inc": {"attempts": 1}}
+        )
+
+    async def _mark_failed(self, message: dict, error: Exception):
+        attempts = message.get("attempts", 0) + 1
+        update = {"attempts": attempts, "last_error": str(error), "locked_until": None}
+        if attempts >= self.max_attempts:
+            update["status"] = "failed"
+            logger.error(f"Giving up on email to {message['to_email']} after {attempts} attempts: {error}")
+        else:
+            delay = min(self.base_delay * (2 ** (attempts - 1)), self.max_delay)
+            update["status"] = "pending"
+            update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=delay)
+        await EmailOutbox.get_motor_collection().update_one({"_id": message["_id"]}, {"$set": update})
+
+dispatcher = EmailDispatcher(
+    concurrency=settings.EMAIL_OUTBOX_CONCURRENCY,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+)
+
+async def enqueue_email(to_email: str, subject: str, body: str, html_body: str = None) -> EmailOutbox:
+    """
+    Stores a rendered message in the outbox and wakes the dispatcher.
+    """
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body, html_body=html_body)
+    await message.insert()
+    dispatcher.notify()
+    return message
+
+async def enqueue_emails(messages: List[EmailMessage], dedupe_keys: List[str] = None) -> int:
+    """
+    Stores many rendered messages with a single insert. Messages whose
+    dedupe key is already in the outbox are skipped.
+    Returns how many messages were queued.
+    """
+    if not messages:
+        return 0
+    keys = dedupe_keys or [None] * len(messages)
+    documents = [
+        EmailOutbox(to_email=m.to_email, subject=m.subject, body=m.body, html_body=m.html_body, dedupe_key=key)
+        for m, key in zip(messages, keys)
+    ]
+
+    queued = len(documents)
+    try:
+        await EmailOutbox.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = e.details.get("writeErrors", [])
+        if any(err.get("code") != 11000 for err in errors):
+            raise
+        queued -= len(errors)
+
+    dispatcher.notify()
+    return queued
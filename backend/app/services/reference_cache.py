@@ -0,0 +1,61 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple
+from app.core.config import settings
+from app.core.http import json_etag
+from app.models.settings import VetSettings
+from app.models.service import Service
+
+class ReferenceCache:
+    """
+    In-process cache for small collections that are read on almost every
+    request and rarely written. Each load gets a content ETag and bumps the
+    version; writers call invalidate(). The TTL bounds how long another
+    worker's write can go unnoticed.
+    """
+
+    def __init__(self, name: str, loader: Callable[[], Awaitable[Any]], ttl: float):
+        self.name = name
+        self.loader = loader
+        self.ttl = ttl
+        self.version = 0
+        self._value: Any = None
+        self._etag: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Tuple[Any, str]:
+        if self._etag is not None and self._expires_at > time.monotonic():
+            return self._value, self._etag
+
+        async with self._lock:
+            # Another request may have refreshed it while we waited
+            if self._etag is not None and self._expires_at > time.monotonic():
+                return self._value, self._etag
+
+            version = self.version
+            value = await self.loader()
+            etag = json_etag(value)
+            if version == self.version:
+                self._value, self._etag = value, etag
+                self._expires_at = time.monotonic() + self.ttl
+            return value, etag
+
+    def invalidate(self):
+        self.version += 1
+        self._value = None
+        self._etag = None
+        self._expires_at = 0.0
+
+async def _load_settings() -> VetSettings:
+    vet_settings = await VetSettings.find_one()
+    if not vet_settings:
+        vet_settings = VetSettings()
+        await vet_settings.insert()
+    return vet_settings
+
+async def _load_services():
+    return await Service.find_all().to_list()
+
+settings_cache = ReferenceCache("vet_settings", _load_settings, ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
+services_cache = ReferenceCache("services", _load_services, ttl=settings.REFERENCE_CACHE_TTL_SECONDS)
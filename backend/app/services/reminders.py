@@ -0,0 +1,116 @@
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+from beanie.operators import In
+from app.core.config import settings
+from app.models.consultation import Consultation
+from app.models.patient import Patient
+from app.models.tutor import Tutor
+from app.models.settings import VetSettings, DEFAULT_REMINDER_TEMPLATE
+from app.services.email import EmailMessage
+from app.services.outbox import enqueue_emails
+from app.services.scheduler import PeriodicTask
+from app.services.templates import render_custom_emails, notes_block
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+# A claim older than this belongs to a worker that died mid-run
+CLAIM_LEASE = timedelta(minutes=10)
+
+async def _claim_batch(now: datetime) -> List[dict]:
+    """
+    Marks up to BATCH_SIZE consultations of the reminder window with a claim
+    token, so concurrent workers never pick the same ones.
+    """
+    collection = Consultation.get_motor_collection()
+    window = {
+        "date": {"$gt": now, "$lte": now + timedelta(hours=settings.REMINDER_WINDOW_HOURS)},
+        "status": "scheduled",
+        "reminder_sent_at": None,
+        "$or": [
+            {"reminder_claim": None},
+            {"reminder_claimed_at": {"$lt": now - CLAIM_LEASE}},
+        ]
+    }
+
+    candidates = await collection.find(window, {"_id": 1}).limit(BATCH_SIZE).to_list(None)
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    await collection.update_many(
+        {"$and": [{"_id": {"$in": [c["_id"] for c in candidates]}}, window]},
+        {"$set": {"reminder_claim": token, "reminder_claimed_at": now}}
+    )
+    return await collection.find(
+        {"reminder_claim": token},
+        {"patient_id": 1, "date": 1, "reason": 1, "notes": 1}
+    ).to_list(None)
+
+async def send_due_reminders() -> int:
+    """
+    Queues a reminder for every scheduled consultation in the next
+    REMINDER_WINDOW_HOURS that has not had one yet. Returns how many were queued.
+    """
+    now = datetime.utcnow()
+    vet_settings = await VetSettings.find_one()
+    template = None
+    if vet_settings:
+        template = vet_settings.email_templates.get("appointment_reminder")
+    template = template or DEFAULT_REMINDER_TEMPLATE
+    try:
+        template.format(tutor_name="", patient_name="", date="", reason="", notes="")
+    except (KeyError, IndexError, ValueError) as e:
+        logger.error(f"Invalid reminder template, using the default one: {e}")
+        template = DEFAULT_REMINDER_TEMPLATE
+
+    queued = 0
+    while True:
+        consultations = await _claim_batch(now)
+        if not consultations:
+            return queued
+
+        # Patients and tutors of the whole batch in two queries
+        patient_ids = list({c["patient_id"] for c in consultations})
+        patients = {p.id: p for p in await Patient.find(In(Patient.id, patient_ids)).to_list()}
+        tutor_ids = list({p.tutor_id for p in patients.values()})
+        tutors = {t.id: t for t in await Tutor.find(In(Tutor.id, tutor_ids)).to_list()}
+
+        recipients, rows, keys = [], [], []
+        for c in consultations:
+            patient = patients.get(c["patient_id"])
+            tutor = tutors.get(patient.tutor_id) if patient else None
+            if not tutor or not tutor.email:
+                continue
+            recipients.append(tutor.email)
+            rows.append({
+                "tutor_name": tutor.full_name,
+                "patient_name": patient.name,
+                "date": c["date"].strftime('%d/%m/%Y %H:%M'),
+                "reason": c.get("reason") or "",
+                "notes": notes_block(c.get("notes"))
+            })
+            # Keyed by date too, so a rescheduled appointment gets a new reminder
+            keys.append(f"reminder:{c['_id']}:{c['date'].isoformat()}")
+
+        messages = [
+            EmailMessage(to_email, "Recordatorio de Cita - PattyVet", body, html_body)
+            for to_email, (body, html_body) in zip(recipients, render_custom_emails(template, "Recordatorio de Cita", rows))
+        ]
+
+        # The dedupe keys make a re-run after a crash harmless
+        queued += await enqueue_emails(messages, dedupe_keys=keys)
+
+        await Consultation.get_motor_collection().update_many(
+            {"_id": {"$in": [c["_id"] for c in consultations]}},
+            {"$set": {"reminder_sent_at": now, "reminder_claim": None, "reminder_claimed_at": None}}
+        )
+
+reminder_task = PeriodicTask(
+    "appointment-reminders",
+    interval=settings.REMINDER_INTERVAL_MINUTES * 60,
+    fn=send_due_reminders,
+    initial_delay=30
+)
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+class PeriodicTask:
+    """
+    Runs a coroutine function every `interval` seconds on the event loop.
+    Errors are logged and the next run happens on schedule. With
+    `until_idle`, the task ends after a run that returns a falsy value.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        fn: Callable[[], Awaitable],
+        initial_delay: float = 0,
+        until_idle: bool = False
+    ):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.initial_delay = initial_delay
+        self.until_idle = until_idle
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        if self.initial_delay:
+            await asyncio.sleep(self.initial_delay)
+        while True:
+            try:
+                if not await self.fn() and self.until_idle:
+                    logger.info(f"Periodic task {self.name} has nothing left to do")
+                    return
+            except Exception as e:
+                logger.error(f"Periodic task {self.name} failed: {e}")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,138 @@
+import asyncio
+import glob
+import logging
+import os
+import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional
+from pymongo import ReturnDocument
+from app.core.config import settings
+from app.models.file_blob import FileBlob
+from app.models.file_record import FileRecord
+from app.services.file_service import BLOB_CLAIM_TIMEOUT, reclaim_blob
+from app.services.scheduler import PeriodicTask
+from app.services.storage import shard_path
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+# A claim older than this belongs to a worker that died mid-batch
+CLAIM_LEASE = timedelta(minutes=10)
+FLAT = {"path": {"$not": {"$regex": "/"}}}
+
+def _move(name: str) -> bool:
+    """
+    Moves a flat file and its thumbnails into the sharded layout. Safe to
+    repeat: a file already moved is left alone. Returns False when the
+    file is in neither place.
+    """
+    src = os.path.join(settings.UPLOAD_DIR, name)
+    dst = os.path.join(settings.UPLOAD_DIR, shard_path(name))
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    for derivative in glob.glob(glob.escape(src) + ".w*"):
+        os.replace(derivative, os.path.join(os.path.dirname(dst), os.path.basename(derivative)))
+    if os.path.exists(src):
+        os.replace(src, dst)
+        return True
+    return os.path.exists(dst)
+
+async def _claim_batch(now: datetime) -> List[dict]:
+    """
+    Marks up to BATCH_SIZE records with flat paths with a claim token, so
+    workers running the migration never move the same files.
+    """
+    records = FileRecord.get_motor_collection()
+    pending = {
+        **FLAT,
+        "$or": [
+            {"shard_claim": None},
+            {"shard_claimed_at": {"$lt": now - CLAIM_LEASE}},
+        ]
+    }
+    candidates = await records.find(pending, {"_id": 1}).limit(BATCH_SIZE).to_list(None)
+    if not candidates:
+        return []
+
+    token = uuid.uuid4().hex
+    await records.update_many(
+        {"$and": [{"_id": {"$in": [c["_id"] for c in candidates]}}, pending]},
+        {"$set": {"shard_claim": token, "shard_claimed_at": now}}
+    )
+    return await records.find({"shard_claim": token}, {"path": 1, "sha256": 1}).to_list(None)
+
+async def _migrate_path(name: str, sha256: Optional[str], now: datetime) -> bool:
+    """
+    Moves one flat file and repoints what refers to it. A shared blob is
+    claimed for the move, so release_blob can't unlink it halfway and no
+    upload writes to the old path. Returns False if the blob is busy.
+    """
+    blobs = FileBlob.get_motor_collection()
+    if sha256:
+        result = await blobs.update_one(
+            {"_id": sha256, "$or": [
+                {"claimed_at": None},
+                {"claimed_at": {"$lt": now - BLOB_CLAIM_TIMEOUT}}
+            ]},
+            {"$set": {"claimed_at": now}}
+        )
+        if not result.modified_count and await blobs.count_documents({"_id": sha256}):
+            return False
+
+    if not await asyncio.to_thread(_move, name):
+        # Repointed anyway, or it would come back in every batch
+        logger.warning(f"Upload {name} is missing on disk")
+    # The file is already at its sharded path, which the resolver checks
+    new_path = shard_path(name)
+    await FileRecord.get_motor_collection().update_many(
+        {"path": name},
+        {"$set": {"path": new_path}, "$unset": {"shard_claim": "", "shard_claimed_at": ""}}
+    )
+    if sha256:
+        blob = await blobs.find_one_and_update(
+            {"_id": sha256, "claimed_at": now},
+            {"$set": {"path": new_path}, "$unset": {"claimed_at": ""}},
+            return_document=ReturnDocument.AFTER
+        )
+        # The last reference may have been released during the move
+        if blob is not None and blob["ref_count"] <= 0:
+            await reclaim_blob(sha256)
+    return True
+
+async def migrate_batch() -> int:
+    """
+    Moves a claimed batch of flat files to the sharded layout, then points
+    their records and blobs at the new paths. Progress lives in the
+    records themselves, so an interrupted run just continues.
+    Returns how many records were claimed, 0 once everything is sharded.
+    """
+    now = datetime.utcnow()
+    claimed = await _claim_batch(now)
+    paths = {r["path"]: r.get("sha256") for r in claimed}
+
+    busy = [name for name, sha256 in paths.items() if not await _migrate_path(name, sha256, now)]
+    if busy:
+        # Picked up again by a later batch once the blob is free
+        await FileRecord.get_motor_collection().update_many(
+            {"path": {"$in": busy}, "shard_claim": {"$ne": None}},
+            {"$unset": {"shard_claim": "", "shard_claimed_at": ""}}
+        )
+        # Give the claimant a moment before the next batch picks them up
+        await asyncio.sleep(1)
+    return len(claimed)
+
+async def migrate_all() -> int:
+    total = 0
+    while True:
+        migrated = await migrate_batch()
+        total += migrated
+        if not migrated:
+            return total
+        logger.info(f"Moved {total} uploads to the sharded layout")
+
+shard_migration_task = PeriodicTask(
+    "upload-shard-migration",
+    interval=settings.UPLOAD_SHARD_MIGRATION_INTERVAL_SECONDS,
+    fn=migrate_batch,
+    initial_delay=60,
+    until_idle=True
+)
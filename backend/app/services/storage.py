@@ -0,0 +1,38 @@
+import os
+from typing import List
+from app.core.config import settings
+
+def shard_path(name: str) -> str:
+    """
+    Relative path of a stored file in the two-level fan-out layout:
+    "3f9a0c...e1.pdf" goes to "3f/9a/3f9a0c...e1.pdf". Names are hashes or
+    uuids, so their prefixes spread evenly.
+    """
+    return os.path.join(name[:2], name[2:4], name)
+
+def is_sharded(relative: str) -> bool:
+    return os.sep in relative or "/" in relative
+
+def candidate_paths(relative: str) -> List[str]:
+    """
+    Absolute locations a stored file may be at. Flat paths of records not
+    migrated yet are also looked up at their sharded location, where the
+    migrator moves the file before it updates the record.
+    """
+    if is_sharded(relative):
+        return [os.path.join(settings.UPLOAD_DIR, relative)]
+    return [
+        os.path.join(settings.UPLOAD_DIR, relative),
+        os.path.join(settings.UPLOAD_DIR, shard_path(relative)),
+    ]
+
+def resolve_path(relative: str) -> str:
+    """
+    Absolute path of a stored file in either layout. Falls back to the
+    primary location when the file exists in neither.
+    """
+    candidates = candidate_paths(relative)
+    for path in candidates:
+        if os.path.exists(path):
+            return path
+    return candidates[0]
@@ -1,3 +1,5 @@
+from typing import List, Optional, Tuple
+
 def get_email_template(title: str, content: str, action_url: str = None, action_text: str = None):
     """
     Generates a responsive HTML email template with PattyVet branding.
@@ -219,3 +221,19 @@ def get_email_template(title: str, content: str, action_url: str = None, action_
 </html>
     """
     return html
+
+def notes_block(notes: Optional[str]) -> str:
+    if not notes:
+        return ""
+    return f"""<br><br><div style="background-color: #f0fdf4; border: 1px solid #bbf7d0; border-radius: 6px; padding: 12px;"><strong>Indicaciones:</strong><br>{notes}</div>"""
+
+def render_custom_email(source: str, title: str, **values) -> Tuple[str, str]:
+    """
+    Renders a clinic template (VetSettings.email_templates) into
+    (plain text body, full html body).
+    """
+    content = source.format(**values).replace('\n', '<br>') # Simple newline to nice HTML conversion
+    return content.replace('<br>', '\n'), get_email_template(title, content)
+
+def render_custom_emails(source: str, title: str, rows: List[dict]) -> List[Tuple[str, str]]:
+    return [render_custom_email(source, title, **values) for values in rows]
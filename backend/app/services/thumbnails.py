@@ -0,0 +1,98 @@
+import asyncio
+import glob
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Requested widths snap to these, which bounds the derivatives per file
+WIDTHS = (160, 320, 640, 1280)
+FORMATS = {"jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Decoding and resizing are CPU bound, keep them off the event loop
+_thumb_executor = ThreadPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS, thread_name_prefix="thumbs")
+# Concurrent requests for the same derivative share one render
+_in_flight: Dict[str, asyncio.Future] = {}
+
+def snap_width(width: int) -> int:
+    for w in WIDTHS:
+        if width <= w:
+            return w
+    return WIDTHS[-1]
+
+def thumbnail_path(source: str, width: int, fmt: str) -> str:
+    # Next to the original; blobs never change so neither do their derivatives
+    return f"{source}.w{width}.{fmt}"
+
+def remove_thumbnails(source: str):
+    for derivative in glob.glob(glob.escape(source) + ".w*"):
+        try:
+            os.remove(derivative)
+        except OSError as e:
+            logger.warning(f"Could not remove thumbnail {derivative}: {e}")
+
+def _open_source(source: str, mime_type: str, width: int):
+    from PIL import Image
+
+    if mime_type == "application/pdf":
+        try:
+            import fitz # pymupdf
+        except ImportError:
+            return None
+        with fitz.open(source) as pdf:
+            if not pdf.page_count:
+                return None
+            page = pdf[0]
+            # Render the first page at about the target width, not full resolution
+            zoom = max(width / page.rect.width, 0.1)
+            pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    image = Image.open(source)
+    # Let the decoder skip detail we are about to throw away (JPEG DCT scaling)
+    image.draft("RGB", (width, width))
+    return image
+
+def _render(source: str, target: str, mime_type: str, width: int, fmt: str) -> bool:
+    from PIL import ImageOps
+
+    image = _open_source(source, mime_type, width)
+    if image is None:
+        return False
+    with image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.thumbnail((width, width * 4))
+
+        part = target + ".part"
+        image.save(part, format=fmt.upper(), quality=80)
+        os.replace(part, target)
+    return True
+
+async def get_thumbnail(source: str, mime_type: str, width: int, fmt: str = "jpeg") -> Optional[str]:
+    """
+    Path of a `width` pixels wide preview of the file at `source`, rendered
+    on first use. None when the file type has no preview.
+    """
+    target = thumbnail_path(source, snap_width(width), fmt)
+    if os.path.exists(target):
+        return target
+
+    future = _in_flight.get(target)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(
+            _thumb_executor, _render, source, target, mime_type, snap_width(width), fmt
+        )
+        _in_flight[target] = future
+        future.add_done_callback(lambda _: _in_flight.pop(target, None))
+
+    try:
+        rendered = await asyncio.shield(future)
+    except Exception as e:
+        logger.error(f"Thumbnail of {source} failed: {e}")
+        return None
+    return target if rendered else None
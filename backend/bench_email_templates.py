@@ -0,0 +1,76 @@
+import subprocess
+import sys
+import os
+import time
+import types
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from app.models.settings import DEFAULT_REMINDER_TEMPLATE
+from app.services import templates
+
+# Commit with the precompiled templates that were reverted, compared against
+COMPILED_REVISION = "c50d57d"
+RENDERS = 20000
+BATCH = 500
+
+VALUES = {
+    "tutor_name": "María González",
+    "patient_name": "Firulais",
+    "date": "12/05/2026 10:30",
+    "reason": "Control anual",
+    "notes": templates.notes_block("Ayuno de 8 horas.\nTraer carnet."),
+}
+
+def load_compiled(revision: str) -> types.ModuleType:
+    """
+    templates.py as of `revision`, loaded from git next to the current one.
+    """
+    source = subprocess.run(
+        ["git", "show", f"{revision}:backend/app/services/templates.py"],
+        check=True, capture_output=True, text=True
+    ).stdout
+    module = types.ModuleType("compiled_templates")
+    exec(compile(source, f"templates.py@{revision}", "exec"), module.__dict__)
+    return module
+
+def per_render(fn, n: int) -> float:
+    started = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return (time.perf_counter() - started) / n * 1_000_000
+
+def bench(module: types.ModuleType) -> dict:
+    return {
+        "layout": per_render(lambda i: module.get_email_template("Recordatorio", "Contenido"), RENDERS),
+        # Cold: a template never seen before, so any parsing or caching is paid
+        "custom cold": per_render(
+            lambda i: module.render_custom_email(f"{DEFAULT_REMINDER_TEMPLATE} #{i}", "Recordatorio", **VALUES),
+            RENDERS
+        ),
+        # Warm: the same clinic template over and over
+        "custom warm": per_render(
+            lambda i: module.render_custom_email(DEFAULT_REMINDER_TEMPLATE, "Recordatorio", **VALUES),
+            RENDERS
+        ),
+        "batch, per message": per_render(
+            lambda i: module.render_custom_emails(DEFAULT_REMINDER_TEMPLATE, "Recordatorio", [VALUES] * BATCH),
+            RENDERS // BATCH
+        ) / BATCH,
+    }
+
+def main():
+    compiled = load_compiled(sys.argv[1] if len(sys.argv) > 1 else COMPILED_REVISION)
+    # Both render the same email, or the comparison means nothing
+    assert compiled.render_custom_email(DEFAULT_REMINDER_TEMPLATE, "R", **VALUES) == \
+        templates.render_custom_email(DEFAULT_REMINDER_TEMPLATE, "R", **VALUES)
+
+    results = {"str.format (current)": bench(templates), "precompiled": bench(compiled)}
+    cases = list(next(iter(results.values())))
+    print(f"{'us per render':<22}" + "".join(f"{case:>20}" for case in cases))
+    for label, timings in results.items():
+        print(f"{label:<22}" + "".join(f"{timings[case]:>20.1f}" for case in cases))
+
+if __name__ == "__main__":
+    main()
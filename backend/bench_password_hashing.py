@@ -0,0 +1,89 @@
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.security import pwd_context, verify_password, get_password_hash, verify_password_async
+
+CONCURRENT_LOGINS = 20
+TICK = 0.005 # Interval of the loop probe, in seconds
+PASSWORD = "correct horse battery staple"
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))]
+
+async def probe_loop(stop: asyncio.Event, stalls: list):
+    """
+    Sleeps TICK over and over and records how late each wake-up is, which
+    is how long the event loop was blocked.
+    """
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        stalls.append(time.perf_counter() - started - TICK)
+
+async def concurrent_logins(hashed: str, verify) -> tuple:
+    """
+    Fires CONCURRENT_LOGINS password checks at once. Returns the latency of
+    each one, from the moment the burst arrived, and the event loop stalls
+    seen meanwhile.
+    """
+    latencies, stalls = [], []
+    stop = asyncio.Event()
+    probe = asyncio.create_task(probe_loop(stop, stalls))
+    await asyncio.sleep(TICK * 2)
+
+    started = time.perf_counter()
+
+    async def login():
+        assert await verify(PASSWORD, hashed)
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*[login() for _ in range(CONCURRENT_LOGINS)])
+    stop.set()
+    await probe
+    return latencies, stalls
+
+async def verify_inline(password: str, hashed: str) -> bool:
+    # How login checked passwords before, on the event loop
+    return verify_password(password, hashed)
+
+def report(label: str, latencies: list, stalls: list):
+    ms = lambda s: f"{s * 1000:.0f} ms"
+    print(
+        f"{label:<22} p50 {ms(statistics.median(latencies)):>8}  p99 {ms(percentile(latencies, 99)):>8}"
+        f"  max loop stall {ms(max(stalls, default=0)):>8}"
+    )
+
+def startup_check(hashed: str) -> tuple:
+    """
+    Times the admin password check of create_initial_user: verifying the
+    stored hash, against re-hashing it as every boot used to.
+    """
+    started = time.perf_counter()
+    assert not pwd_context.needs_update(hashed) and verify_password(PASSWORD, hashed)
+    verify = time.perf_counter() - started
+
+    started = time.perf_counter()
+    get_password_hash(PASSWORD)
+    rehash = time.perf_counter() - started
+    return verify, rehash
+
+async def main():
+    hashed = get_password_hash(PASSWORD)
+
+    verify, rehash = startup_check(hashed)
+    print(f"Startup admin check: verify {verify * 1000:.0f} ms, re-hashing as before took {rehash * 1000:.0f} ms plus a write")
+
+    print(f"{CONCURRENT_LOGINS} concurrent logins, {settings.PASSWORD_HASH_WORKERS} hashing workers")
+    report("inline (before)", *await concurrent_logins(hashed, verify_inline))
+    report("thread pool (now)", *await concurrent_logins(hashed, verify_password_async))
+
+if __name__ == "__main__":
+    asyncio.run(main())
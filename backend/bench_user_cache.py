@@ -0,0 +1,51 @@
+import asyncio
+import statistics
+import sys
+import os
+import time
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from app.core.config import settings
+from app.core.database import init_db
+from app.core import security
+from app.core.security import create_access_token
+from app.routes.auth import resolve_user, invalidate_user
+
+ITERATIONS = 500
+
+async def time_resolve(token: str, cold: bool) -> list:
+    """
+    Latency of resolve_user per call. Cold clears the user and token caches
+    before every call, which is what each request cost before the caches.
+    """
+    timings = []
+    await resolve_user(token)
+    for _ in range(ITERATIONS):
+        if cold:
+            invalidate_user()
+            security._token_cache.clear()
+        started = time.perf_counter()
+        await resolve_user(token)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+def report(label: str, timings: list):
+    us = lambda s: f"{s * 1_000_000:.0f} us"
+    print(f"{label:<24} p50 {us(statistics.median(timings)):>9}  mean {us(statistics.mean(timings)):>9}")
+
+async def main():
+    # Uses the admin user init_db makes sure exists
+    await init_db()
+    token = create_access_token({"sub": settings.ADMIN_EMAIL.strip()})
+
+    cold = await time_resolve(token, cold=True)
+    warm = await time_resolve(token, cold=False)
+    print(f"resolve_user, {ITERATIONS} calls each")
+    report("cold (decode + find_one)", cold)
+    report("warm (cached)", warm)
+    print(f"Saved per request: {(statistics.median(cold) - statistics.median(warm)) * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    asyncio.run(main())
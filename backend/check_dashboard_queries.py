@@ -0,0 +1,88 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from pymongo import monitoring
+from app.core.database import init_db
+from app.models.patient import Patient
+from app.models.consultation import Consultation
+from app.routes.dashboard import _agenda
+
+# Seed data goes to a day no real consultation uses, and is removed after
+SEED_DAY = datetime(2199, 1, 1)
+SEED_REASON = "check_dashboard_queries"
+
+class CommandCounter(monitoring.CommandListener):
+    """
+    Counts the queries sent to the server. getMore only fetches the next
+    batch of a query already counted, so it's left out.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.enabled = False
+
+    def started(self, event):
+        if self.enabled and event.command_name in ("find", "aggregate"):
+            self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+async def seed(n: int):
+    # Half of the consultations predate the snapshot and need their patient
+    result = await Patient.get_motor_collection().insert_many(
+        [{"name": f"Check {i}", "species": "Perro"} for i in range(n)]
+    )
+    rows = []
+    for i, pid in enumerate(result.inserted_ids):
+        row = {"patient_id": pid, "date": SEED_DAY + timedelta(minutes=i), "reason": SEED_REASON, "status": "scheduled"}
+        if i % 2:
+            row["patient_snapshot"] = {"name": f"Check {i}", "species": "Perro"}
+        rows.append(row)
+    await Consultation.get_motor_collection().insert_many(rows)
+    return result.inserted_ids
+
+async def cleanup(patient_ids: list):
+    await Consultation.get_motor_collection().delete_many({"reason": SEED_REASON, "date": {"$gte": SEED_DAY}})
+    await Patient.get_motor_collection().delete_many({"_id": {"$in": patient_ids}})
+
+async def count_queries(counter: CommandCounter, n: int) -> int:
+    patient_ids = await seed(n)
+    try:
+        counter.count = 0
+        counter.enabled = True
+        rows = await _agenda({"date": {"$gte": SEED_DAY, "$lt": SEED_DAY + timedelta(days=1)}})
+        counter.enabled = False
+        assert len(rows) == n and all(r["patient_name"] for r in rows)
+        return counter.count
+    finally:
+        counter.enabled = False
+        await cleanup(patient_ids)
+
+async def main() -> int:
+    counter = CommandCounter()
+    # Listeners only apply to clients created after they are registered
+    monitoring.register(counter)
+    await init_db()
+
+    small = await count_queries(counter, 10)
+    large = await count_queries(counter, 100)
+    print(f"10 consultations: {small} queries")
+    print(f"100 consultations: {large} queries")
+
+    if large != small:
+        print("FAIL  the agenda issues more queries as it grows (N+1)")
+        return 1
+    print("OK    the agenda resolves patients with a constant number of queries")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
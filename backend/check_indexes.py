@@ -0,0 +1,68 @@
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from bson import ObjectId
+from app.core.database import init_db
+from app.models.user import User
+from app.models.patient import Patient
+from app.models.consultation import Consultation
+from app.models.exam import Exam
+from app.models.prescription import Prescription
+from app.models.file_record import FileRecord
+
+def hot_queries():
+    """
+    The queries issued by the API routes, as (label, model, filter, sort).
+    """
+    oid = ObjectId()
+    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    today_end = today_start + timedelta(days=1)
+    return [
+        ("consultations by patient", Consultation, {"patient_id": oid}, [("date", -1)]),
+        ("dashboard today", Consultation, {"date": {"$gte": today_start, "$lt": today_end}}, [("date", 1)]),
+        ("dashboard calendar", Consultation, {"date": {"$gte": today_start, "$lte": today_end + timedelta(days=31)}}, None),
+        ("exams by patient", Exam, {"patient_id": oid}, [("date", -1)]),
+        ("prescriptions by patient", Prescription, {"patient_id": oid}, [("date", -1)]),
+        ("files by owner", FileRecord, {"owner_id": str(oid), "owner_type": "exam"}, None),
+        ("patients by tutor", Patient, {"$or": [{"tutor_id": oid}, {"tutor2_id": oid}]}, None),
+        ("user by email", User, {"email": "admin@paty.vet"}, None),
+    ]
+
+def has_stage(plan: dict, stage: str) -> bool:
+    if plan.get("stage") == stage:
+        return True
+    children = []
+    if "inputStage" in plan:
+        children.append(plan["inputStage"])
+    children.extend(plan.get("inputStages", []))
+    return any(has_stage(child, stage) for child in children)
+
+async def main() -> int:
+    await init_db()
+    failures = 0
+
+    for label, model, query, sort in hot_queries():
+        cursor = model.get_motor_collection().find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        plan = explain["queryPlanner"]["winningPlan"]
+        # Plans from the slot-based engine wrap the classic plan under queryPlan
+        plan = plan.get("queryPlan", plan)
+
+        if has_stage(plan, "COLLSCAN"):
+            failures += 1
+            print(f"FAIL  {label}: COLLSCAN on {model.get_collection_name()}")
+        else:
+            print(f"OK    {label}")
+
+    print(f"{failures} queries fall back to COLLSCAN")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
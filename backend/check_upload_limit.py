@@ -0,0 +1,87 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from fastapi import FastAPI, File, UploadFile
+from app.core.limits import UploadLimitMiddleware, MULTIPART_OVERHEAD
+
+# Small limits so the oversize bodies stay small too
+MAX_SIZE = 1024
+MAX_BATCH_SIZE = 4 * 1024
+BOUNDARY = b"limitcheck"
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(UploadLimitMiddleware, max_size=MAX_SIZE, max_batch_size=MAX_BATCH_SIZE)
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return app
+
+def multipart(size: int) -> bytes:
+    return (
+        b"--" + BOUNDARY + b"\r\n"
+        b'Content-Disposition: form-data; name="file"; filename="a.pdf"\r\n'
+        b"Content-Type: application/pdf\r\n\r\n"
+        + b"x" * size + b"\r\n--" + BOUNDARY + b"--\r\n"
+    )
+
+async def post(app, body: bytes, content_length: bool, chunk_size: int = 16 * 1024) -> int:
+    """
+    Sends the body through the ASGI app in chunks and returns the status.
+    Without Content-Length it's a chunked upload, counted as it arrives.
+    """
+    headers = [(b"content-type", b"multipart/form-data; boundary=" + BOUNDARY)]
+    if content_length:
+        headers.append((b"content-length", str(len(body)).encode()))
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/upload", "raw_path": b"/upload",
+        "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80),
+    }
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)] or [b""]
+    messages = [
+        {"type": "http.request", "body": c, "more_body": i < len(chunks) - 1}
+        for i, c in enumerate(chunks)
+    ]
+    status = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    return status[0]
+
+async def main() -> int:
+    app = build_app()
+    oversize = MAX_SIZE + MULTIPART_OVERHEAD + 200 * 1024
+    cases = [
+        ("small upload", multipart(MAX_SIZE // 2), True, 200),
+        ("oversize with Content-Length", multipart(oversize), True, 413),
+        ("oversize chunked", multipart(oversize), False, 413),
+    ]
+
+    failures = 0
+    for label, body, content_length, expected in cases:
+        status = await post(app, body, content_length)
+        if status == expected:
+            print(f"OK    {label}: {status}")
+        else:
+            failures += 1
+            print(f"FAIL  {label}: {status}, expected {expected}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
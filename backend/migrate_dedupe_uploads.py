@@ -0,0 +1,109 @@
+"""
+Moves uploads to content-addressed blobs and rebuilds their reference counts.
+
+Run it with the API STOPPED. The reference counts are $set from a count of
+the records, which would overwrite the $inc of uploads and deletes made
+while it runs; a count ending at 0 under a live record gets its file
+unlinked. Files are also renamed under records the API may be serving.
+Pass --api-stopped to confirm. Once the API is down it's safe to re-run.
+"""
+import asyncio
+import hashlib
+import sys
+import os
+from datetime import datetime
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from pymongo import UpdateOne
+from app.core.config import settings
+from app.core.database import init_db
+from app.models.file_record import FileRecord
+from app.models.file_blob import FileBlob
+from app.services.storage import shard_path, resolve_path
+
+CHUNK_SIZE = 1024 * 1024
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def move_to_blob(record: dict, blobs: dict) -> tuple:
+    """
+    Moves a record's file to its content-addressed name, dropping it if
+    that blob already exists. Returns (sha256, blob path) or None when the
+    file is missing.
+    """
+    src = resolve_path(record["path"])
+    if not os.path.exists(src):
+        return None
+    sha256 = file_sha256(src)
+    ext = record["path"].rsplit(".", 1)[-1]
+    # Reuse an existing blob of the same content whatever its extension
+    blob_name = blobs.setdefault(sha256, shard_path(f"{sha256}.{ext}"))
+
+    dst = os.path.join(settings.UPLOAD_DIR, blob_name)
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    if src != dst:
+        if os.path.exists(dst):
+            os.remove(src)
+        else:
+            os.replace(src, dst)
+    return sha256, blob_name
+
+async def main():
+    if "--api-stopped" not in sys.argv[1:]:
+        print("Stop the API first, then run: python migrate_dedupe_uploads.py --api-stopped")
+        sys.exit(1)
+    print("Deduplicating uploads...")
+    await init_db()
+    files = FileRecord.get_motor_collection()
+    # sha256 -> blob file name, for blobs already on disk
+    blobs = {b["_id"]: b["path"] async for b in FileBlob.get_motor_collection().find({}, {"path": 1})}
+
+    # 1. Point every record at its blob. Safe to re-run: done records are skipped
+    moved, missing = 0, 0
+    async for record in files.find({"sha256": None}, {"path": 1}):
+        result = await asyncio.to_thread(move_to_blob, record, blobs)
+        if result is None:
+            missing += 1
+            print(f"Missing on disk: {record['path']}")
+            continue
+        sha256, blob_name = result
+        await files.update_one({"_id": record["_id"]}, {"$set": {"sha256": sha256, "path": blob_name}})
+        moved += 1
+    print(f"Records moved to blobs: {moved}, missing files: {missing}")
+
+    # Records hashed on upload before this migration still own a uuid-named file
+    async for record in files.find({"sha256": {"$ne": None}}, {"path": 1, "sha256": 1}):
+        if not os.path.basename(record["path"]).startswith(record["sha256"]):
+            result = await asyncio.to_thread(move_to_blob, record, blobs)
+            if result:
+                await files.update_one({"_id": record["_id"]}, {"$set": {"path": result[1]}})
+
+    # 2. Rebuild the blob reference counts from the records
+    groups = await files.aggregate([
+        {"$match": {"sha256": {"$ne": None}}},
+        {"$group": {"_id": "$sha256", "path": {"$first": "$path"}, "size": {"$first": "$size"}, "refs": {"$sum": 1}}}
+    ]).to_list(None)
+    ops = [
+        UpdateOne(
+            {"_id": g["_id"]},
+            {
+                "$set": {"path": g["path"], "size": g["size"], "ref_count": g["refs"]},
+                "$setOnInsert": {"created_at": datetime.utcnow()}
+            },
+            upsert=True
+        )
+        for g in groups
+    ]
+    if ops:
+        await FileBlob.get_motor_collection().bulk_write(ops, ordered=False)
+    print(f"Blobs: {len(ops)} for {sum(g['refs'] for g in groups)} records")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,56 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from pymongo import UpdateOne
+from app.core.database import init_db
+from app.models.exam import Exam
+from app.models.consultation import Consultation
+from app.models.file_record import FileRecord, FileSummary
+
+BATCH_SIZE = 500
+
+async def flush(model, owner_type: str, owner_ids: list) -> int:
+    files = await FileRecord.find(
+        {"owner_type": owner_type, "owner_id": {"$in": [str(i) for i in owner_ids]}}
+    ).sort("created_at").to_list()
+
+    grouped = {str(i): [] for i in owner_ids}
+    for f in files:
+        grouped[f.owner_id].append(f)
+
+    ops = [
+        UpdateOne({"_id": owner_id}, {"$set": {
+            "file_ids": [str(f.id) for f in grouped[str(owner_id)]],
+            "files": [FileSummary.from_record(f).model_dump() for f in grouped[str(owner_id)]]
+        }})
+        for owner_id in owner_ids
+    ]
+    await model.get_motor_collection().bulk_write(ops, ordered=False)
+    return len(ops)
+
+async def backfill(model, owner_type: str) -> int:
+    updated = 0
+    batch = []
+    async for doc in model.get_motor_collection().find({}, {"_id": 1}):
+        batch.append(doc["_id"])
+        if len(batch) >= BATCH_SIZE:
+            updated += await flush(model, owner_type, batch)
+            batch = []
+    if batch:
+        updated += await flush(model, owner_type, batch)
+    return updated
+
+async def main():
+    print("Backfilling embedded file summaries...")
+    await init_db()
+    exams = await backfill(Exam, "exam")
+    print(f"Exams updated: {exams}")
+    consultations = await backfill(Consultation, "consultation")
+    print(f"Consultations updated: {consultations}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
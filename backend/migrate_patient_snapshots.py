@@ -0,0 +1,40 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from pymongo import UpdateMany
+from app.core.database import init_db
+from app.models.patient import Patient
+from app.models.consultation import Consultation
+
+BATCH_SIZE = 500
+
+async def main():
+    print("Backfilling patient snapshots on consultations...")
+    await init_db()
+    consultations = Consultation.get_motor_collection()
+    updated = 0
+    batch = []
+
+    async def flush():
+        nonlocal updated
+        result = await consultations.bulk_write(batch, ordered=False)
+        updated += result.modified_count
+        batch.clear()
+
+    async for p in Patient.get_motor_collection().find({}, {"name": 1, "species": 1}):
+        batch.append(UpdateMany(
+            {"patient_id": p["_id"]},
+            {"$set": {"patient_snapshot": {"name": p.get("name"), "species": p.get("species")}}}
+        ))
+        if len(batch) >= BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    print(f"Consultations updated: {updated}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
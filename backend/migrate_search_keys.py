@@ -0,0 +1,40 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from pymongo import UpdateOne
+from app.core.database import init_db
+from app.core.search import build_search_keys
+from app.models.patient import Patient
+from app.models.tutor import Tutor, tutor_search_keys
+
+BATCH_SIZE = 1000
+
+async def backfill(model, fields: dict, keys_for) -> int:
+    collection = model.get_motor_collection()
+    updated = 0
+    batch = []
+    async for doc in collection.find({}, fields):
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_keys": keys_for(doc)}}))
+        if len(batch) >= BATCH_SIZE:
+            await collection.bulk_write(batch, ordered=False)
+            updated += len(batch)
+            batch = []
+    if batch:
+        await collection.bulk_write(batch, ordered=False)
+        updated += len(batch)
+    return updated
+
+async def main():
+    print("Backfilling search keys...")
+    await init_db()
+    patients = await backfill(Patient, {"name": 1}, lambda d: build_search_keys(d.get("name")))
+    print(f"Patients updated: {patients}")
+    tutors = await backfill(Tutor, {"full_name": 1, "phone": 1}, lambda d: tutor_search_keys(d.get("full_name"), d.get("phone")))
+    print(f"Tutors updated: {tutors}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
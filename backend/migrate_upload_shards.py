@@ -0,0 +1,21 @@
+import asyncio
+import sys
+import os
+
+# Add current directory to path so we can import app
+sys.path.append(os.getcwd())
+
+from app.core.database import init_db
+from app.services.shard_migrator import migrate_all
+
+async def main():
+    # The API can do this in the background too (UPLOAD_SHARD_MIGRATION=true),
+    # this runs it to completion in one go. Safe to interrupt and re-run,
+    # and to run alongside the API: batches and blobs are claimed.
+    print("Moving uploads to the sharded layout...")
+    await init_db()
+    moved = await migrate_all()
+    print(f"Paths migrated: {moved}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -2,28 +2,49 @@ import asyncio
 from app.core.database import init_db
 from app.models.file_record import FileRecord
 from app.core.config import settings
+from app.services.storage import resolve_path, is_sharded
 import os
+import re
+
+# Thumbnails (<file>.w320.webp) and interrupted uploads are not stored files
+SKIP = re.compile(r"(\.w\d+\.(jpeg|webp)|\.part)$")
+
+def walk_files(root: str):
+    """
+    Yields the stored files under root in both layouts, one directory at a
+    time instead of one huge listing.
+    """
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append(entry.path)
+                elif not SKIP.search(entry.name):
+                    yield entry.path
 
 async def main():
     await init_db()
-    files = await FileRecord.find_all().to_list()
-    print(f"Total entries in DB: {len(files)}")
     
     upload_dir = settings.UPLOAD_DIR
     print(f"Upload Dir: {upload_dir}")
     
     if os.path.exists(upload_dir):
-        on_disk = os.listdir(upload_dir)
-        print(f"Files on disk: {len(on_disk)}")
-        print(f"Disk files: {on_disk}")
+        on_disk = sum(1 for _ in walk_files(upload_dir))
+        print(f"Files on disk: {on_disk}")
     else:
         print("Upload dir does not exist!")
-        on_disk = []
 
-    for f in files:
-        file_path = os.path.join(upload_dir, f.path)
-        exists = os.path.exists(file_path)
-        print(f"ID: {f.id} | Name: {f.original_name} | Mime: {f.mime_type} | Exists: {exists}")
+    total, flat, missing = 0, 0, 0
+    async for f in FileRecord.find_all():
+        total += 1
+        if not is_sharded(f.path):
+            flat += 1
+        if not os.path.exists(resolve_path(f.path)):
+            missing += 1
+            print(f"MISSING ID: {f.id} | Name: {f.original_name} | Mime: {f.mime_type} | Path: {f.path}")
+
+    print(f"Total entries in DB: {total} | Not yet sharded: {flat} | Missing on disk: {missing}")
 
 if __name__ == "__main__":
     asyncio.run(main())
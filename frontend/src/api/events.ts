@@ -0,0 +1,27 @@
+import api from './axios';
+
+export type AgendaEvent = {
+    type: 'consultation.created' | 'consultation.updated' | 'consultation.deleted';
+    id: string;
+    patient_id: string | null;
+    patient_name: string | null;
+    date: string | null;
+    reason: string | null;
+    status: string | null;
+};
+
+const EVENT_TYPES = ['consultation.created', 'consultation.updated', 'consultation.deleted'];
+
+// Subscribes to agenda changes made from any workstation. Returns the unsubscribe function.
+export const subscribeAgenda = (onEvent: (event: AgendaEvent) => void) => {
+    const token = localStorage.getItem('token');
+    if (!token || typeof EventSource === 'undefined') {
+        return () => {};
+    }
+
+    const source = new EventSource(`${api.defaults.baseURL}/events/stream?token=${encodeURIComponent(token)}`);
+    const listener = (e: MessageEvent) => onEvent(JSON.parse(e.data));
+    EVENT_TYPES.forEach((type) => source.addEventListener(type, listener as EventListener));
+
+    return () => source.close();
+};
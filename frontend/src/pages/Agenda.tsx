@@ -1,5 +1,6 @@
 import { useEffect, useState } from 'react';
 import api from '../api/axios';
+import { subscribeAgenda } from '../api/events';
 import { ChevronLeft, ChevronRight, Plus, X, Clock } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import Select from 'react-select';
@@ -46,7 +47,7 @@ const Agenda = () => {
         const loadPatients = async () => {
             try {
                 // Fetching all patients for search. In production, consider async select with search endpoint
-                const { data } = await api.get('/patients?limit=100');
+                const { data } = await api.get('/patients?limit=100&fields=name,species,breed');
                 setPatients(data.map((p: any) => ({
                     value: p._id,
                     label: `${p.name} (${p.species}) - ${p.breed} `
@@ -60,6 +61,8 @@ const Agenda = () => {
 
     useEffect(() => {
         fetchEvents();
+        // Refresh when another workstation changes this month's agenda
+        return subscribeAgenda(() => fetchEvents());
     }, [currentDate]);
 
     const handleSave = async (e: React.FormEvent) => {
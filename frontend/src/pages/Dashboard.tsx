@@ -1,5 +1,6 @@
 import { useEffect, useState } from 'react';
 import api from '../api/axios';
+import { subscribeAgenda } from '../api/events';
 import { Users, User, Calendar, Activity, Clock } from 'lucide-react';
 import { Link } from 'react-router-dom';
 import WelcomeModal from '../components/WelcomeModal';
@@ -47,6 +48,7 @@ const Dashboard = () => {
             }
         };
         fetchData();
+        return subscribeAgenda(() => fetchData());
     }, []);
 
     const formatDate = (dateString: string) => {
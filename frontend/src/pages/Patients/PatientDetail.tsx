@@ -1,4 +1,4 @@
-import { useEffect, useState } from 'react';
+import { useEffect, useRef, useState } from 'react';
 import { useParams, Link, useNavigate, useSearchParams } from 'react-router-dom';
 import api from '../../api/axios';
 import { ArrowLeft, FileText, Activity, Beaker, Pill, Edit2, Image as ImageIcon } from 'lucide-react';
@@ -14,6 +14,8 @@ const PatientDetail = () => {
     const navigate = useNavigate();
     const [patient, setPatient] = useState<any>(null);
     const [activeTab, setActiveTab] = useState(searchParams.get('tab') || 'summary');
+    // Lists that came with the chart, each handed once to the first tab that mounts
+    const prefetched = useRef<Record<string, any[]>>({});
 
     useEffect(() => {
         const tab = searchParams.get('tab');
@@ -21,11 +23,24 @@ const PatientDetail = () => {
     }, [searchParams]);
 
     useEffect(() => {
-        api.get(`/patients/${id}`)
-            .then(({ data }) => setPatient(data))
+        api.get(`/patients/${id}/chart`)
+            .then(({ data }) => {
+                // Sections with more pages are left to the tabs, which load them whole
+                prefetched.current = {};
+                for (const key of ['consultations', 'exams', 'prescriptions']) {
+                    if (!data[`${key}_cursor`]) prefetched.current[key] = data[key];
+                }
+                setPatient(data.patient);
+            })
             .catch(() => navigate('/pacientes'));
     }, [id, navigate]);
 
+    const takePrefetched = (key: string) => () => {
+        const list = prefetched.current[key];
+        delete prefetched.current[key];
+        return list;
+    };
+
     if (!patient) return <div className="p-8 text-center">Cargando...</div>;
 
     const renderTab = () => {
@@ -33,6 +48,7 @@ const PatientDetail = () => {
             case 'summary': return <SummaryTab patient={patient} />;
             case 'consultations': return <ConsultationsTab
                 patientId={patient._id}
+                takePrefetched={takePrefetched('consultations')}
                 selectedConsultationId={searchParams.get('consultationId') || undefined}
                 onClearSelection={() => {
                     const newParams = new URLSearchParams(searchParams);
@@ -40,8 +56,8 @@ const PatientDetail = () => {
                     navigate({ search: newParams.toString() }, { replace: true });
                 }}
             />;
-            case 'exams': return <ExamsTab patientId={patient._id} />;
-            case 'prescriptions': return <PrescriptionsTab patientId={patient._id} />;
+            case 'exams': return <ExamsTab patientId={patient._id} takePrefetched={takePrefetched('exams')} />;
+            case 'prescriptions': return <PrescriptionsTab patientId={patient._id} takePrefetched={takePrefetched('prescriptions')} />;
             case 'gallery': return <GalleryTab patientId={patient._id} />;
             default: return null;
         }
@@ -20,7 +20,7 @@ const PatientsList = () => {
         setLoading(true);
         try {
             const { data } = await api.get('/patients', {
-                params: { search }
+                params: { search, fields: 'name,species,breed' }
             });
             // Ideally backend expands tutor, or we fetch it. 
             // For now, assuming backend returns IDs, and we might display "Tutor ID" or expand in backend.
@@ -3,7 +3,7 @@ import api from '../../../api/axios';
 import { Plus, Trash2, FileText, ChevronDown, ChevronUp } from 'lucide-react';
 import { useForm } from 'react-hook-form';
 
-const ConsultationsTab = ({ patientId, selectedConsultationId, onClearSelection }: { patientId: string, selectedConsultationId?: string, onClearSelection?: () => void }) => {
+const ConsultationsTab = ({ patientId, selectedConsultationId, onClearSelection, takePrefetched }: { patientId: string, selectedConsultationId?: string, onClearSelection?: () => void, takePrefetched?: () => any[] | undefined }) => {
     const [consultations, setConsultations] = useState<any[]>([]);
     const [showForm, setShowForm] = useState(false);
 
@@ -14,7 +14,9 @@ const ConsultationsTab = ({ patientId, selectedConsultationId, onClearSelection
     };
 
     useEffect(() => {
-        fetchConsultations();
+        const prefetched = takePrefetched?.();
+        if (prefetched) setConsultations(prefetched);
+        else fetchConsultations();
     }, [patientId]);
 
     return (
@@ -104,14 +106,12 @@ const ConsultationForm = ({ patientId, consultation, onSuccess, onCancel }: any)
 
             // Upload files if any
             if (selectedFiles && selectedFiles.length > 0 && consultationId) {
-                const filePromises = Array.from(selectedFiles).map(file => {
-                    const formData = new FormData();
-                    formData.append('file', file);
-                    return api.post(`/consultations/${consultationId}/files`, formData, {
-                        headers: { 'Content-Type': 'multipart/form-data' }
-                    });
+                // One request, the server stores the files concurrently
+                const formData = new FormData();
+                Array.from(selectedFiles).forEach(file => formData.append('files', file));
+                await api.post(`/consultations/${consultationId}/files/batch`, formData, {
+                    headers: { 'Content-Type': 'multipart/form-data' }
                 });
-                await Promise.all(filePromises);
             }
 
             reset();
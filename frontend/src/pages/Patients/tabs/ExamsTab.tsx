@@ -3,7 +3,7 @@ import api from '../../../api/axios';
 import { Plus, Download, Trash2, FilePlus } from 'lucide-react';
 import { useForm } from 'react-hook-form';
 
-const ExamsTab = ({ patientId }: { patientId: string }) => {
+const ExamsTab = ({ patientId, takePrefetched }: { patientId: string, takePrefetched?: () => any[] | undefined }) => {
     const [exams, setExams] = useState<any[]>([]);
     const [showForm, setShowForm] = useState(false);
 
@@ -12,7 +12,9 @@ const ExamsTab = ({ patientId }: { patientId: string }) => {
     };
 
     useEffect(() => {
-        fetchExams();
+        const prefetched = takePrefetched?.();
+        if (prefetched) setExams(prefetched);
+        else fetchExams();
     }, [patientId]);
 
     return (
@@ -207,15 +209,16 @@ const ExamForm = ({ patientId, onSuccess }: any) => {
 
             // 2. Upload Files if any
             if (pendingFiles.length > 0) {
+                // One request, comments[i] belongs to files[i]
+                const formData = new FormData();
                 for (const pf of pendingFiles) {
-                    const formData = new FormData();
-                    formData.append('file', pf.file);
-                    if (pf.comment) formData.append('comment', pf.comment);
-
-                    await api.post(`/exams/${newExam._id}/files`, formData, {
-                        headers: { 'Content-Type': 'multipart/form-data' }
-                    });
+                    formData.append('files', pf.file);
+                    formData.append('comments', pf.comment || '');
                 }
+
+                await api.post(`/exams/${newExam._id}/files/batch`, formData, {
+                    headers: { 'Content-Type': 'multipart/form-data' }
+                });
             }
 
             onSuccess();
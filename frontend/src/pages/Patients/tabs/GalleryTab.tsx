@@ -23,6 +23,7 @@ const GalleryTab = ({ patientId }: { patientId: string }) => {
                             allImages.push({
                                 id: file._id || file.id,
                                 url: `${api.defaults.baseURL}/files/${file._id || file.id}`,
+                                thumbUrl: `${api.defaults.baseURL}/files/${file._id || file.id}/thumb?w=320`,
                                 displayDate: file.created_at || c.date, // Use upload date!
                                 consultationReason: c.reason,
                                 consultationId: c._id
@@ -36,6 +37,7 @@ const GalleryTab = ({ patientId }: { patientId: string }) => {
                         allImages.push({
                             id: fileId,
                             url: `${api.defaults.baseURL}/files/${fileId}`,
+                            thumbUrl: `${api.defaults.baseURL}/files/${fileId}/thumb?w=320`,
                             displayDate: c.date, // Fallback to consultation date
                             consultationReason: c.reason,
                             consultationId: c._id
@@ -93,8 +95,9 @@ const GalleryTab = ({ patientId }: { patientId: string }) => {
                         onClick={() => setSelectedImage(img.url)}
                     >
                         <img
-                            src={img.url}
+                            src={img.thumbUrl}
                             alt={`Consulta ${img.consultationReason}`}
+                            loading="lazy"
                             className="w-full h-full object-cover"
                             onError={(e) => { (e.target as HTMLImageElement).src = 'https://via.placeholder.com/300?text=Error'; }}
                         />
@@ -3,7 +3,7 @@ import api from '../../../api/axios';
 import { Plus, Trash2, Printer, Edit } from 'lucide-react';
 import { useForm, useFieldArray } from 'react-hook-form';
 
-const PrescriptionsTab = ({ patientId }: { patientId: string }) => {
+const PrescriptionsTab = ({ patientId, takePrefetched }: { patientId: string, takePrefetched?: () => any[] | undefined }) => {
     const [prescriptions, setPrescriptions] = useState<any[]>([]);
     const [showForm, setShowForm] = useState(false);
     const [editingPrescription, setEditingPrescription] = useState<any>(null);
@@ -13,7 +13,9 @@ const PrescriptionsTab = ({ patientId }: { patientId: string }) => {
     };
 
     useEffect(() => {
-        fetchPrescriptions();
+        const prefetched = takePrefetched?.();
+        if (prefetched) setPrescriptions(prefetched);
+        else fetchPrescriptions();
     }, [patientId]);
 
     const downloadPDF = async (id: string, patientName: string) => {
@@ -20,7 +20,7 @@ const TutorsList = () => {
         setLoading(true);
         try {
             const { data } = await api.get('/tutors', {
-                params: { search }
+                params: { search, fields: 'full_name,phone,email' }
             });
             setTutors(data);
         } catch (error) {